@@ -0,0 +1,266 @@
+"""Per-answer history in SQLite, with the aggregate queries behind the game-over stats.
+
+Print a report from the repository root:
+    python analytics.py [--db PATH] [--limit 10]
+"""
+import argparse
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from utils import get_data_folder
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    bank TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    started REAL NOT NULL,
+    ended REAL,
+    score INTEGER,
+    answers INTEGER NOT NULL DEFAULT 0,
+    credit REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS questions (
+    id TEXT PRIMARY KEY,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    answers INTEGER NOT NULL DEFAULT 0,
+    credit REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS bank_questions (
+    bank TEXT NOT NULL,
+    question TEXT NOT NULL REFERENCES questions(id),
+    answers INTEGER NOT NULL DEFAULT 0,
+    credit REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (bank, question)
+);
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY,
+    session INTEGER NOT NULL REFERENCES sessions(id),
+    question TEXT NOT NULL REFERENCES questions(id),
+    user_answer TEXT,
+    result TEXT NOT NULL,
+    credit REAL NOT NULL,
+    latency REAL NOT NULL,
+    streak INTEGER NOT NULL,
+    mode TEXT NOT NULL,
+    answered REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS answers_question ON answers(question);
+CREATE INDEX IF NOT EXISTS answers_session_latency ON answers(session, latency);
+CREATE INDEX IF NOT EXISTS answers_latency ON answers(latency);
+CREATE INDEX IF NOT EXISTS sessions_bank ON sessions(bank);
+"""
+
+# result is correct, close, incorrect or timeout; credit follows the game's
+# scoring (1, 0.5 or 0). The answers/credit totals on sessions, questions and
+# bank_questions (the same totals per bank) are kept up to date by the writer,
+# so the aggregate queries read hundreds of rows instead of every answer.
+
+
+def connect(path):
+    db = sqlite3.connect(path, check_same_thread=False)
+    # WAL lets the report queries read while the writer thread commits.
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    upgrade = db.execute("SELECT 1 FROM sqlite_master WHERE name = 'bank_questions'").fetchone() is None
+    db.executescript(SCHEMA)
+    if upgrade:
+        # Stores written before per-bank totals existed: count their history once.
+        with db:
+            db.execute("INSERT INTO bank_questions (bank, question, answers, credit) "
+                       "SELECT sessions.bank, answers.question, COUNT(*), SUM(answers.credit) "
+                       "FROM answers JOIN sessions ON sessions.id = answers.session "
+                       "GROUP BY sessions.bank, answers.question")
+    return db
+
+
+def accuracy(db, session=None, bank=None):
+    """(answers, mean credit) for one session, one bank, or everything"""
+    if session is not None:
+        row = db.execute("SELECT answers, credit FROM sessions WHERE id = ?", (session,)).fetchone() or (0, 0.0)
+    elif bank is not None:
+        row = db.execute("SELECT SUM(answers), SUM(credit) FROM sessions WHERE bank = ?", (bank,)).fetchone()
+    else:
+        row = db.execute("SELECT SUM(answers), SUM(credit) FROM sessions").fetchone()
+    answers, credit = row[0] or 0, row[1] or 0.0
+    return answers, credit / answers if answers else 0.0
+
+
+def accuracy_by_bank(db):
+    return db.execute("SELECT bank, SUM(answers) AS n, SUM(credit) / SUM(answers) FROM sessions "
+                      "GROUP BY bank HAVING n > 0 ORDER BY bank").fetchall()
+
+
+def latency_percentiles(db, session=None, percentiles=(50, 90, 99)):
+    """Answer latency percentiles in seconds, read off the latency index without sorting"""
+    if session is None:
+        count = db.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        query, args = "SELECT latency FROM answers ORDER BY latency LIMIT 1 OFFSET ?", ()
+    else:
+        count = db.execute("SELECT COUNT(*) FROM answers WHERE session = ?", (session,)).fetchone()[0]
+        query, args = "SELECT latency FROM answers WHERE session = ? ORDER BY latency LIMIT 1 OFFSET ?", (session,)
+    if not count:
+        return {}
+    return {p: db.execute(query, args + (min(count - 1, count * p // 100),)).fetchone()[0] for p in percentiles}
+
+
+def hardest_questions(db, limit=10, min_answers=3, bank=None):
+    """(question, answer, answers, mean credit) on one bank or everything, lowest credit first"""
+    if bank is None:
+        return db.execute("SELECT question, answer, answers, credit / answers AS c FROM questions "
+                          "WHERE answers >= ? ORDER BY c, answers DESC LIMIT ?", (min_answers, limit)).fetchall()
+    return db.execute("SELECT q.question, q.answer, b.answers, b.credit / b.answers AS c "
+                      "FROM bank_questions b JOIN questions q ON q.id = b.question "
+                      "WHERE b.bank = ? AND b.answers >= ? ORDER BY c, b.answers DESC LIMIT ?",
+                      (bank, min_answers, limit)).fetchall()
+
+
+# Answer history store. The game thread only queues rows; a background thread
+# writes whatever has queued up in one transaction, so a frame never waits on
+# SQLite. Game-over stats are queried on the same thread after the session's
+# rows are committed and handed back through a callback.
+class AnalyticsStore:
+    def __init__(self, path=None, bank="questions.csv", max_pending=4096):
+        self.path = Path(path) if path is not None else get_data_folder() / 'analytics.sqlite3'
+        self.bank = bank
+        self.queue = queue.Queue(max_pending)
+        self.session = None
+        self.thread = threading.Thread(target=self.run, name="analytics", daemon=True)
+        self.thread.start()
+
+    def begin_session(self, mode, started=None):
+        started = time.time() if started is None else started
+        # Wall-clock microseconds make a unique id without waiting for SQLite to assign one.
+        self.session = int(started * 1e6)
+        self.queue.put(("session", (self.session, self.bank, mode, started)))
+        return self.session
+
+    def record(self, question_id, question, answer, user_answer, result, credit, latency, streak, mode, answered=None):
+        answered = time.time() if answered is None else answered
+        self.queue.put(("answer", (self.session, question_id, user_answer, result, credit, latency, streak, mode, answered,
+                                   question, answer)))
+
+    def end_session(self, score, ended=None, on_stats=None):
+        """Close the session; on_stats(stats) is called from the writer thread once its rows are committed"""
+        ended = time.time() if ended is None else ended
+        self.queue.put(("end", (ended, score, self.session)))
+        if on_stats is not None:
+            self.queue.put(("stats", (self.session, on_stats)))
+
+    def close(self):
+        self.queue.put(("close", None))
+        self.thread.join()
+
+    def run(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = connect(self.path)
+        except (OSError, sqlite3.Error) as e:
+            print(f'Error opening analytics store: {e}')
+            db = None
+        while True:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if db is None:
+                if any(op == "close" for op, _ in batch):
+                    return
+                continue
+            try:
+                with db:
+                    self.write(db, batch)
+            except sqlite3.Error as e:
+                print(f'Error writing analytics: {e}')
+            for op, value in batch:
+                if op == "stats":
+                    session, on_stats = value
+                    try:
+                        on_stats(self.session_stats(db, session))
+                    except sqlite3.Error as e:
+                        print(f'Error reading analytics: {e}')
+                elif op == "close":
+                    db.close()
+                    return
+
+    def write(self, db, batch):
+        sessions, answers, ends = [], [], []
+        session_totals, question_totals = {}, {}
+        for op, value in batch:
+            if op == "session":
+                sessions.append(value)
+            elif op == "answer":
+                answers.append(value[:9])
+                session, question_id, credit = value[0], value[1], value[4]
+                totals = session_totals.setdefault(session, [0, 0.0])
+                totals[0] += 1
+                totals[1] += credit
+                totals = question_totals.setdefault(question_id, [value[9], value[10], 0, 0.0])
+                totals[2] += 1
+                totals[3] += credit
+            elif op == "end":
+                ends.append(value)
+        db.executemany("INSERT OR IGNORE INTO sessions (id, bank, mode, started) VALUES (?, ?, ?, ?)", sessions)
+        db.executemany("INSERT INTO answers (session, question, user_answer, result, credit, latency, streak, mode, answered) "
+                       "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", answers)
+        db.executemany("UPDATE sessions SET answers = answers + ?, credit = credit + ? WHERE id = ?",
+                       [(n, credit, session) for session, (n, credit) in session_totals.items()])
+        db.executemany("INSERT INTO questions (id, question, answer, answers, credit) VALUES (?, ?, ?, ?, ?) "
+                       "ON CONFLICT(id) DO UPDATE SET question = excluded.question, answer = excluded.answer, "
+                       "answers = answers + excluded.answers, credit = credit + excluded.credit",
+                       [(question_id, *totals) for question_id, totals in question_totals.items()])
+        db.executemany("INSERT INTO bank_questions (bank, question, answers, credit) VALUES (?, ?, ?, ?) "
+                       "ON CONFLICT(bank, question) DO UPDATE SET "
+                       "answers = answers + excluded.answers, credit = credit + excluded.credit",
+                       [(self.bank, question_id, totals[2], totals[3]) for question_id, totals in question_totals.items()])
+        db.executemany("UPDATE sessions SET ended = ?, score = ? WHERE id = ?", ends)
+
+    def session_stats(self, db, session):
+        answers, credit = accuracy(db, session=session)
+        bank_answers, bank_credit = accuracy(db, bank=self.bank)
+        return {
+            "answers": answers,
+            "accuracy": credit,
+            "latency": latency_percentiles(db, session, (50, 90)),
+            "bank_answers": bank_answers,
+            "bank_accuracy": bank_credit,
+            "hardest": hardest_questions(db, limit=2, bank=self.bank),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report on the answer history")
+    parser.add_argument("--db", default=str(get_data_folder() / 'analytics.sqlite3'))
+    parser.add_argument("--limit", type=int, default=10, help="hardest questions to list")
+    args = parser.parse_args(argv)
+    if not Path(args.db).exists():
+        print(f"no answer history at {args.db}")
+        return 1
+    db = connect(args.db)
+    answers, credit = accuracy(db)
+    print(f"{answers} answers, {credit:.0%} credit overall")
+    latency = latency_percentiles(db)
+    if latency:
+        print("answer time " + "  ".join(f"p{p} {value:.2f}s" for p, value in latency.items()))
+    print("\nBy bank:")
+    for bank, n, c in accuracy_by_bank(db):
+        print(f"  {bank}: {n} answers, {c:.0%}")
+    print("\nLast sessions:")
+    for session, bank, mode, score in db.execute(
+            "SELECT id, bank, mode, score FROM sessions ORDER BY started DESC LIMIT 5").fetchall():
+        n, c = accuracy(db, session=session)
+        print(f"  {time.strftime('%Y-%m-%d %H:%M', time.localtime(session / 1e6))} {mode:7} score {score}  {n} answers, {c:.0%}")
+    print("\nHardest questions:")
+    for question, answer, n, c in hardest_questions(db, args.limit):
+        print(f"  {c:4.0%} of {n:3}  {question[:70]}  ->  {answer.strip()[:30]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
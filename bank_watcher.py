@@ -0,0 +1,94 @@
+import csv
+import os
+import queue
+import threading
+from collections import Counter, defaultdict
+from data_loader import parse_rows
+
+
+# Watches the bank's CSV files for edits while the game runs. Polling happens on
+# a background thread: a changed file is diffed line by line against the last
+# version seen and only the added and removed lines are parsed. Each diff is
+# queued as (removed indices, [(index, question), ...]) using the same indices
+# load_bank gives the merged bank, for the game thread to apply between frames.
+# Rows are assumed to fit on one line, as they do in every bank we ship.
+class BankWatcher:
+    def __init__(self, filenames, interval=1.0, notify=None):
+        self.filenames = list(filenames)
+        self.interval = interval
+        # Called from the watcher thread after a diff is queued (e.g. to wake the main loop).
+        self.notify = notify
+        self.signatures = {}
+        self.lines = {}
+        # Live indices of each question, so a removed row maps back to its slot.
+        self.slots = defaultdict(list)
+        self.count = 0
+        self.changes = queue.SimpleQueue()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="bank-watcher", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        # The first read must see the same files load_bank did; an edit saved
+        # in between is only picked up by the next one.
+        for filename in self.filenames:
+            lines = self.read(filename)
+            if lines is None:
+                lines = []
+            self.lines[filename] = Counter(lines)
+            for question in parse_rows(csv.reader(lines)):
+                self.slots[question].append(self.count)
+                self.count += 1
+        while not self.stopped.wait(self.interval):
+            for filename in self.filenames:
+                self.check(filename)
+
+    def read(self, filename):
+        try:
+            stat = os.stat(filename)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if self.signatures.get(filename) == signature:
+                return None
+            with open(filename, newline='', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except (OSError, UnicodeDecodeError):
+            # Missing or half-written (editors often save by rename); try again next poll.
+            return None
+        self.signatures[filename] = signature
+        return lines
+
+    def check(self, filename):
+        lines = self.read(filename)
+        if lines is None:
+            return
+        old = self.lines[filename]
+        new = Counter(lines)
+        self.lines[filename] = new
+        removed = list(parse_rows(csv.reader((old - new).elements())))
+        added = list(parse_rows(csv.reader((new - old).elements())))
+        removed_indices = []
+        for question in removed:
+            slots = self.slots.get(question)
+            if slots:
+                removed_indices.append(slots.pop())
+        added_pairs = []
+        for question in added:
+            self.slots[question].append(self.count)
+            added_pairs.append((self.count, question))
+            self.count += 1
+        if removed_indices or added_pairs:
+            self.changes.put((removed_indices, added_pairs))
+            if self.notify is not None:
+                self.notify()
+
+    def poll(self):
+        """Diffs queued since the last call, oldest first; never blocks"""
+        changes = []
+        while True:
+            try:
+                changes.append(self.changes.get_nowait())
+            except queue.Empty:
+                return changes
+
+    def stop(self):
+        self.stopped.set()
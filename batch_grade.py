@@ -0,0 +1,132 @@
+"""Grade typed answers offline with the game's rules, across a process pool.
+
+Run from the repository root:
+    python batch_grade.py answers.csv [--bank questions.csv ...] [--output graded.csv] [--workers N]
+
+Each input row is question, typed answer, then any other columns (student,
+exam...), which are passed through. Each output row is the input row followed by
+result (correct, close, incorrect or unknown), credit, similarity (correct and
+close only) and the bank's answer. Rows are read, graded and written in chunks, so memory use stays flat
+however long the input is, and the output keeps the input's order.
+"""
+import argparse
+import collections
+import csv
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+from data_loader import load_bank
+from matching import answer_key, SIMILARITY_THRESHOLD
+
+RESULT_COLUMNS = ["result", "credit", "similarity", "correct_answer"]
+
+# Per-process question -> [(answer, extra info), ...], set up by load_answers.
+answers = None
+
+
+def load_answers(banks):
+    global answers
+    answers = {}
+    # Every copy of a repeated question counts when grading, so banks aren't de-duplicated.
+    for question in load_bank(banks, dedupe=False):
+        answers.setdefault(question.question.strip(), []).append((question.answer, question.extra_info))
+
+
+def grade_row(row):
+    """RESULT_COLUMNS for one (question, typed answer, ...) row, graded the way submit_answer does"""
+    if len(row) < 2:
+        return ["unknown", "0", "", ""]
+    entries = answers.get(row[0].strip())
+    if not entries:
+        return ["unknown", "0", "", ""]
+    # A question listed more than once is graded against its best-matching entry.
+    similarity, answer = max((answer_key(answer, extra_info).similarity(row[1]), answer) for answer, extra_info in entries)
+    if similarity == 1.0:
+        result, credit = "correct", "1"
+    elif similarity >= SIMILARITY_THRESHOLD:
+        result, credit = "close", "0.5"
+    else:
+        # Grading stops measuring once an answer can't reach the threshold.
+        return ["incorrect", "0", "", answer.strip()]
+    return [result, credit, f"{similarity:.3f}", answer.strip()]
+
+
+def grade_chunk(rows):
+    return [grade_row(row) for row in rows]
+
+
+def chunks(rows, size, sent=None):
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        if sent is not None:
+            sent.append(chunk)
+        yield chunk
+
+
+def grade_file(infile, outfile, banks, workers=None, chunk_size=2000, header=False):
+    """Grade every row of infile into outfile; returns the number of rows with each result"""
+    reader = csv.reader(infile)
+    writer = csv.writer(outfile)
+    if header:
+        first = next(reader, None)
+        if first is not None:
+            writer.writerow(first + RESULT_COLUMNS)
+    totals = {"correct": 0, "close": 0, "incorrect": 0, "unknown": 0}
+    workers = workers or os.cpu_count() or 1
+    # Workers only send back the result columns; the input rows wait here to be joined with them.
+    sent = collections.deque()
+    if workers == 1:
+        load_answers(banks)
+        graded = map(grade_chunk, chunks(reader, chunk_size, sent))
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers, initializer=load_answers, initargs=(banks,))
+        # imap keeps input order and only pulls chunks as workers free up.
+        graded = pool.imap(grade_chunk, chunks(reader, chunk_size, sent))
+    try:
+        for results in graded:
+            rows = sent.popleft()
+            writer.writerows(row + result for row, result in zip(rows, results))
+            for result in results:
+                totals[result[0]] += 1
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grade typed answers against the question bank")
+    parser.add_argument("input", help="CSV of question, typed answer[, ...] rows, or - for stdin")
+    parser.add_argument("--bank", metavar="CSV", action="append", help="question file; repeat to merge (default: questions.csv)")
+    parser.add_argument("--output", "-o", help="graded CSV (default: stdout)")
+    parser.add_argument("--workers", type=int, help="grading processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="rows per unit of work")
+    parser.add_argument("--header", action="store_true", help="the first input row is a header")
+    args = parser.parse_args(argv)
+
+    banks = [os.path.abspath(bank) for bank in args.bank or ["questions.csv"]]
+    infile = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    outfile = sys.stdout if args.output is None else open(args.output, "w", newline="", encoding="utf-8")
+    start = time.perf_counter()
+    try:
+        totals = grade_file(infile, outfile, banks, args.workers, args.chunk_size, args.header)
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+    elapsed = time.perf_counter() - start
+    rows = sum(totals.values())
+    summary = "  ".join(f"{name} {count}" for name, count in totals.items())
+    print(f"{rows} rows in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s): {summary}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
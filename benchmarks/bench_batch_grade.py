@@ -0,0 +1,64 @@
+"""Scaling benchmark for batch_grade.py.
+
+Run from the repository root:
+    python benchmarks/bench_batch_grade.py [--rows 100000] [--workers 1 2 4]
+
+Generates a synthetic exam from the A+ bank (mostly right answers, some typos,
+some wrong), grades it with each worker count and reports rows/s and speedup
+over one worker.
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from batch_grade import grade_file
+from data_loader import load_bank
+
+
+def synthetic_exam(path, bank, rows, rng):
+    questions = list(load_bank(bank, dedupe=False))
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        for n in range(rows):
+            question = rng.choice(questions)
+            answer = question.answer
+            roll = rng.random()
+            if roll < 0.2 and len(answer) > 4:
+                i = rng.randrange(len(answer))
+                answer = answer[:i] + answer[i + 1:]
+            elif roll < 0.3:
+                answer = "no idea"
+            writer.writerow([question.question, answer, f"student{n % 500}"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+    bank = [os.path.join(ROOT, "questionsaplus.csv")]
+    with tempfile.TemporaryDirectory() as tmp:
+        exam = os.path.join(tmp, "exam.csv")
+        synthetic_exam(exam, bank, args.rows, random.Random(1))
+        base = None
+        for workers in sorted(set(args.workers)):
+            with open(exam, newline="", encoding="utf-8") as infile:
+                start = time.perf_counter()
+                totals = grade_file(infile, io.StringIO(), bank, workers)
+                elapsed = time.perf_counter() - start
+            base = base or elapsed
+            print(f"{workers:3} workers  {elapsed:6.2f}s  {args.rows / elapsed:10,.0f} rows/s  "
+                  f"speedup {base / elapsed:4.2f}x  {totals}")
+    print(f"({os.cpu_count()} CPUs available)")
+
+
+if __name__ == "__main__":
+    main()
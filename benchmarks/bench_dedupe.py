@@ -0,0 +1,107 @@
+"""Scaling benchmark for dedupe.py: MinHash/LSH against comparing every pair.
+
+Run from the repository root:
+    python benchmarks/bench_dedupe.py [--questions 10000 50000] [--brute 500]
+
+Each synthetic bank is random-word questions, a family of templated ones
+("Port for service N?") and reworded copies of some questions with the same
+answer: a changed case, a typo, a dropped or swapped word. Reports time and
+recall of the planted copies at each size, and times the all-pairs check on
+--brute questions to extrapolate its quadratic cost.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_loader import ColumnBank
+from dedupe import find_duplicates, same_answer, Clusters, DUPLICATE_THRESHOLD
+from matching import normalize, similarity
+
+
+def reword(text, rng):
+    words = text.split()
+    edit = rng.randrange(4)
+    if edit == 0:
+        return text.upper()
+    if edit == 1:
+        i = rng.randrange(len(text) - 1)
+        return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+    if edit == 2 and len(words) > 8:
+        del words[rng.randrange(len(words))]
+    else:
+        i = rng.randrange(len(words) - 1)
+        words[i], words[i + 1] = words[i + 1], words[i]
+    return " ".join(words)
+
+
+def synthetic_bank(count, rng):
+    vocabulary = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 9)))
+                  for _ in range(5000)]
+    rows = []
+    planted = []
+    while len(rows) < count:
+        roll = rng.random()
+        if roll < 0.1:
+            rows.append((f"Port and protocol for service {len(rows)}?", f"{rng.randrange(65536)}/TCP", ""))
+        elif roll < 0.15 and rows:
+            original = rng.randrange(len(rows))
+            question, answer, extra = rows[original]
+            rows.append((reword(question, rng), answer, extra))
+            planted.append((original, len(rows) - 1))
+        else:
+            rows.append((" ".join(rng.choice(vocabulary) for _ in range(rng.randint(8, 14))) + "?",
+                         rng.choice(vocabulary), ""))
+    return ColumnBank(rows), planted
+
+
+def brute_force(questions):
+    texts = [normalize(q.question) for q in questions]
+    clusters = Clusters()
+    for i in range(len(texts)):
+        for j in range(i + 1, len(texts)):
+            if similarity(texts[i], texts[j], DUPLICATE_THRESHOLD) >= DUPLICATE_THRESHOLD and same_answer(questions[i], questions[j]):
+                clusters.union(i, j)
+    return clusters.groups()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--brute", type=int, default=500, help="bank size for the all-pairs comparison")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    bank, _ = synthetic_bank(args.brute, rng)
+    start = time.perf_counter()
+    brute = brute_force(bank)
+    brute_time = time.perf_counter() - start
+    start = time.perf_counter()
+    lsh = find_duplicates(bank)
+    lsh_time = time.perf_counter() - start
+    print(f"{args.brute:,} questions: all pairs {brute_time:.2f}s, LSH {lsh_time:.3f}s, "
+          f"same clusters: {brute == lsh} ({len(lsh)} clusters)")
+
+    for count in args.questions:
+        bank, planted = synthetic_bank(count, random.Random(count))
+        start = time.perf_counter()
+        clusters = find_duplicates(bank)
+        elapsed = time.perf_counter() - start
+        root = {}
+        for cluster in clusters:
+            for question_id in cluster:
+                root[question_id] = cluster[0]
+        # A reworded copy counts only if the rewording kept it within the threshold.
+        expected = [(i, j) for i, j in planted
+                    if similarity(normalize(bank[i].question), normalize(bank[j].question)) >= DUPLICATE_THRESHOLD]
+        found = sum(1 for i, j in expected if i in root and root.get(i) == root.get(j))
+        estimate = brute_time * (count / args.brute) ** 2
+        print(f"{count:,} questions: LSH {elapsed:.2f}s ({elapsed / count * 1e6:.0f} us/question), "
+              f"recall {found}/{len(expected)}, all pairs would take ~{estimate / 60:.0f} min")
+
+
+if __name__ == "__main__":
+    main()
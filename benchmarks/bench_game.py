@@ -0,0 +1,157 @@
+"""Benchmark suite for the game core and the pygame front end.
+
+Run from the repository root:
+    python benchmarks/bench_game.py            compare against benchmarks/baseline.json
+    python benchmarks/bench_game.py --save     record a new baseline
+
+Every result is seconds per operation; a result more than --tolerance slower
+than the baseline is reported as a regression and the script exits with 1.
+Frame benchmarks use SDL's dummy video driver and an offscreen surface, and
+are skipped when pygame is not installed.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from game_core import GameCore, TEXT, SUBMIT, START
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+LARGE_BANK = 100_000
+
+
+def synthetic_bank(size):
+    return [(f"Synthetic question number {i}?", f"answer {i}", f"extra info {i}") for i in range(size)]
+
+
+def best_of(fn, number, repeat=5):
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+def started_core(questions, mode="normal"):
+    core = GameCore(questions, seed=1)
+    core.dispatch((START, (mode, 10 ** 9, 10 ** 6)))
+    return core
+
+
+def bench_core_answers(questions):
+    core = started_core(questions)
+
+    def answer():
+        core.dispatch((TEXT, core.current_question.answer))
+        core.dispatch((SUBMIT, None))
+    return best_of(answer, 5000)
+
+
+def bench_next_question(questions, mode):
+    core = started_core(questions, mode)
+    if mode == "clear":
+        # Retire as we go, like correct answers do, without running out.
+        def step():
+            core.available_questions.retire(core.current_index)
+            if not core.available_questions:
+                core.reset_game()
+            core.next_question()
+        return best_of(step, 20000)
+    return best_of(core.next_question, 20000)
+
+
+def bench_index_query(questions, query):
+    from question_index import QuestionIndex, parse_query
+    index = QuestionIndex.build(questions)
+    terms = parse_query(query)
+    return best_of(lambda: index.search(terms), 2000)
+
+
+def frame_benchmarks(questions):
+    try:
+        import pygame
+    except ImportError:
+        return {}
+    from game_logic import TypingGame
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    screen = pygame.Surface((800, 600))
+    font = pygame.font.Font(None, 36)
+    game = TypingGame(None, font, screen, seed=1, questions=questions)
+    game.dispatch((START, ("normal", 10 ** 9, 10 ** 6)))
+    results = {}
+
+    def handle_input():
+        for ch in game.current_question.answer:
+            game.handle_input(pygame.event.Event(pygame.KEYDOWN, key=0, unicode=ch))
+        game.handle_input(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_RETURN, unicode="\r"))
+    results["handle_input_answer"] = best_of(handle_input, 2000)
+
+    def full_frame():
+        game.renderer.invalidate()
+        game.update()
+        game.draw()
+        game.renderer.present()
+    results["draw_full_frame"] = best_of(full_frame, 300)
+
+    def steady_frame():
+        game.update()
+        game.draw()
+        game.renderer.present()
+    results["draw_steady_frame"] = best_of(steady_frame, 3000)
+    return results
+
+
+def run():
+    bank = os.path.join(ROOT, "questionsaplus.csv")
+    from data_loader import ColumnBank, parse_questions
+    questions = ColumnBank(parse_questions(bank))
+    large = ColumnBank(synthetic_bank(LARGE_BANK))
+    results = {
+        "core_answer": bench_core_answers(questions),
+        "next_question_normal_100k": bench_next_question(large, "normal"),
+        "next_question_clear_100k": bench_next_question(large, "clear"),
+        "index_query_keywords": bench_index_query(questions, 'wind "10"'),
+        "index_query_prefix_100k": bench_index_query(large, "12"),
+    }
+    results.update(frame_benchmarks(questions))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--save", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (default 0.25)")
+    args = parser.parse_args()
+
+    results = run()
+    baseline = {}
+    if os.path.exists(BASELINE):
+        with open(BASELINE, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    regressions = []
+    for name, value in results.items():
+        line = f"{name:28} {value * 1e6:10.2f} us"
+        if name in baseline:
+            ratio = value / baseline[name]
+            line += f"   baseline {baseline[name] * 1e6:10.2f} us  ({ratio:5.2f}x)"
+            if ratio > 1 + args.tolerance:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line)
+
+    if args.save:
+        with open(BASELINE, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {BASELINE}")
+    elif regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
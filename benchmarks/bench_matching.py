@@ -0,0 +1,65 @@
+"""Micro-benchmark: answer grading with the matching engine vs the old difflib path.
+
+Run from the repository root: python benchmarks/bench_matching.py [bank.csv]
+"""
+import difflib
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_loader import parse_questions
+from matching import AnswerKey, SIMILARITY_THRESHOLD
+
+
+def difflib_grade(user_input, answer):
+    # The grading path TypingGame.handle_input used before the matching engine.
+    user_answer = user_input.strip().lower()
+    correct_answer = answer.strip().lower()
+    if user_answer == correct_answer:
+        return 1.0
+    similarity = difflib.SequenceMatcher(None, user_answer, correct_answer).ratio()
+    return similarity if similarity >= SIMILARITY_THRESHOLD else 0.0
+
+
+def typo(text, rng):
+    chars = list(text)
+    if chars:
+        i = rng.randrange(len(chars))
+        chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    return "".join(chars)
+
+
+def build_cases(questions, rng):
+    # Mix of exact, near-miss and unrelated submissions, like a real session.
+    cases = []
+    for question, answer, extra in questions:
+        other = rng.choice(questions)[1]
+        for user_input in (answer, typo(answer.strip(), rng), other):
+            cases.append((user_input, answer, extra))
+    return cases
+
+
+def main():
+    bank = sys.argv[1] if len(sys.argv) > 1 else "questionsaplus.csv"
+    questions = parse_questions(bank)
+    cases = build_cases(questions, random.Random(0))
+    keys = {(answer, extra): AnswerKey(answer, extra) for _, answer, extra in cases}
+
+    def run_difflib():
+        for user_input, answer, _ in cases:
+            difflib_grade(user_input, answer)
+
+    def run_engine():
+        for user_input, answer, extra in cases:
+            keys[answer, extra].similarity(user_input)
+
+    for name, fn in (("difflib", run_difflib), ("engine", run_engine)):
+        best = min(timeit.repeat(fn, number=1, repeat=5))
+        print(f"{name:8} {len(cases) / best:12,.0f} answers/s  {best / len(cases) * 1e6:7.2f} us/answer")
+
+
+if __name__ == "__main__":
+    main()
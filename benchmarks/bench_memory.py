@@ -0,0 +1,107 @@
+"""Memory benchmark: question bank layouts and wrong-answer tracking.
+
+Run from the repository root:
+    python benchmarks/bench_memory.py [--questions 100000] [--misses 10000]
+
+Builds a synthetic bank shaped like the shipped ones and measures the Python
+heap each layout holds with tracemalloc. The compiled bank keeps its rows in an
+mmap'd file, so its file size is reported separately.
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from data_loader import ColumnBank, CompiledBank, Question, compile_questions, file_sha1
+from matching import normalize
+
+
+def synthetic_rows(count, rng):
+    # Field lengths and repeats as in the shipped banks: questions ~55 characters,
+    # answers ~13 with 3% repeated ("True", "Yes"...), extra info ~96 and nearly
+    # always unique. With so few repeats, sharing strings saves little there.
+    common = ["True", "False", "Yes", "No"]
+    rows = []
+    for n in range(count):
+        answer = rng.choice(common) if rng.random() < 0.03 else f"answer {n:06d}"
+        extra = f"Extra info for item {n}: " + " ".join(rng.choice(WORDS) for _ in range(12))
+        # Each field is built fresh, the way csv.reader hands them back.
+        rows.append((f"Question number {n}: what is the value of item {n}?", "".join(list(answer)), extra))
+    return rows
+
+
+WORDS = ["port", "protocol", "default", "setting", "command", "windows", "linux", "network", "secure", "cable"]
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = build()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used, value
+
+
+def report(label, used, count):
+    print(f"  {label:42} {used / 2**20:8.1f} MiB  {used / count:7.0f} B each")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=100_000)
+    parser.add_argument("--misses", type=int, default=10_000)
+    args = parser.parse_args()
+    rng = random.Random(1)
+
+    print(f"bank of {args.questions:,} questions (strings included):")
+    # Every layout copies the rows first, so none of them shares strings with `rows`.
+    source = synthetic_rows(args.questions, rng)
+    used, tuples = measure(lambda: [tuple("".join(list(field)) for field in row) for row in source])
+    report("list of (question, answer, extra) tuples", used, args.questions)
+    used, objects = measure(lambda: [Question(n, *("".join(list(field)) for field in row))
+                                     for n, row in enumerate(source)])
+    report("list of Question records", used, args.questions)
+    del objects
+    used, columns = measure(lambda: ColumnBank(tuple("".join(list(field)) for field in row) for row in source))
+    report("ColumnBank (shared columns)", used, args.questions)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "bank.csv")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write("synthetic\n")
+        cache_path = csv_path + ".qbc"
+        compile_questions(source, cache_path, os.stat(csv_path), file_sha1(csv_path))
+        used, compiled = measure(lambda: CompiledBank(cache_path))
+        report("CompiledBank (mmap, heap only)", used, args.questions)
+        print(f"  {'  + compiled file, paged in on demand':42} {os.path.getsize(cache_path) / 2**20:8.1f} MiB")
+        sample = rng.randrange(args.questions)
+        assert compiled[sample].normalized_answer == normalize(source[sample][1])
+        compiled.close()
+
+    print(f"\n{args.misses:,} wrong answers:")
+    picks = [rng.randrange(args.questions) for _ in range(args.misses)]
+    typed = ["".join(list(tuples[i][1].strip()[:-1] or "x")) for i in picks]
+    # The old report kept a dict per miss referencing the question's existing strings.
+    used, _ = measure(lambda: [{"question": tuples[i][0], "correct_answer": tuples[i][1],
+                                "user_answer": user_answer, "extra_info": tuples[i][2]}
+                               for i, user_answer in zip(picks, typed)])
+    report("dict per miss", used, args.misses)
+    used, _ = measure(lambda: [(i, user_answer) for i, user_answer in zip(picks, typed)])
+    report("(question id, typed answer)", used, args.misses)
+
+    # Sanity check: the compact layouts hold the same data.
+    sample = rng.randrange(args.questions)
+    assert columns[sample].answer == tuples[sample][1]
+    assert columns[sample].normalized_answer == normalize(tuples[sample][1])
+
+
+if __name__ == "__main__":
+    main()
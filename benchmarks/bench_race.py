@@ -0,0 +1,113 @@
+"""Loopback load generator for race_server.py.
+
+Run from the repository root:
+    python benchmarks/bench_race.py [--typists 300] [--rounds 20] [--think-ms 200]
+
+Starts a race server on 127.0.0.1 (or targets --port on --host) and connects N
+simulated typists. Each answers every question after a random think time,
+mostly correctly, sometimes with a typo or a wrong answer. Latency is measured
+on the client from sending an answer to receiving its result, so it includes
+the loopback round trip and any queueing in the server's event loop.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from data_loader import load_bank
+from race_server import RaceServer, encode
+
+
+def typo(answer, rng):
+    if len(answer) < 4:
+        return answer
+    i = rng.randrange(len(answer))
+    return answer[:i] + answer[i + 1:]
+
+
+async def typist(n, host, port, answers, think, latencies, rng):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode({"type": "join", "name": f"typist{n}"}))
+    sent = None
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        message = json.loads(line)
+        kind = message["type"]
+        if kind == "question":
+            await asyncio.sleep(rng.uniform(0, think))
+            answer = answers[message["question"]]
+            roll = rng.random()
+            if roll < 0.15:
+                answer = typo(answer, rng)
+            elif roll < 0.25:
+                answer = "no idea"
+            sent = time.perf_counter()
+            writer.write(encode({"type": "answer", "round": message["round"], "answer": answer}))
+        elif kind == "result" and sent is not None:
+            latencies.append(time.perf_counter() - sent)
+            sent = None
+        elif kind == "final":
+            break
+    writer.close()
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def run(args):
+    questions = load_bank(args.bank or [os.path.join(ROOT, "questionsaplus.csv")])
+    # Typists "know" every answer; the bank's first answer for a repeated question wins.
+    answers = {}
+    for question in questions:
+        if question is not None:
+            answers.setdefault(question.question, question.answer)
+    server = None
+    race = None
+    port = args.port
+    if port is None:
+        race = RaceServer(questions, args.rounds, args.question_time, seed=1)
+        server = await asyncio.start_server(race.handle_client, "127.0.0.1", 0, backlog=args.typists)
+        port = server.sockets[0].getsockname()[1]
+    rng = random.Random(2)
+    latencies = []
+    clients = [typist(n, args.host, port, answers, args.think_ms / 1000, latencies, random.Random(rng.random()))
+               for n in range(args.typists)]
+    start = time.perf_counter()
+    if race is not None:
+        await asyncio.gather(race.run_race(args.typists, lobby=30), *clients)
+        server.close()
+    else:
+        await asyncio.gather(*clients)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f"{args.typists} typists, {args.rounds} rounds, {len(latencies)} answers graded in {elapsed:.2f}s")
+    if latencies:
+        print(f"grading latency p50 {percentile(latencies, 0.5) * 1000:.2f} ms  "
+              f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms  max {latencies[-1] * 1000:.2f} ms")
+    if race is not None:
+        print(f"server: {race.graded} answers graded, {race.graded / elapsed:,.0f} answers/s overall")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--typists", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--think-ms", type=float, default=200, help="each answer is sent after up to this long")
+    parser.add_argument("--question-time", type=float, default=15)
+    parser.add_argument("--bank", action="append", help="question file(s) for the local server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="load an already running race server instead of starting one")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Micro-benchmark: keystroke capture cost.
+
+Run from the repository root: python benchmarks/bench_telemetry.py [--budget-us 1.0]
+
+Times KeystrokeLog.key on its own, then the whole per-key path through
+GameCore.dispatch with and without capture (swapped for a log that does
+nothing), and end_question on a question whose keys are already captured.
+Exits with 1 if a capture costs more than the budget, either on its own or
+as the difference it makes to dispatch.
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clock import ManualClock
+from game_core import GameCore, TEXT, BACKSPACE, START
+from telemetry import KeystrokeLog, BACKSPACE_CODE, ENTER_CODE
+
+
+class NoCapture(KeystrokeLog):
+    def key(self, now, code):
+        pass
+
+
+def best_of(fn, number, repeat=7):
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+def per_key_dispatch(keystrokes):
+    core = GameCore([(f"Question {i}?", f"answer {i}", "") for i in range(100)], seed=1, clock=ManualClock())
+    core.keystrokes = keystrokes
+    core.dispatch((START, ("normal", 10 ** 9, 10 ** 6)))
+    text, backspace = (TEXT, "a"), (BACKSPACE, None)
+
+    def keys():
+        # Typing and erasing keeps the input short, so string growth isn't what's measured.
+        core.dispatch(text)
+        core.dispatch(backspace)
+    return best_of(keys, 100_000) / 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-us", type=float, default=1.0, help="maximum capture cost per key")
+    args = parser.parse_args()
+
+    log = KeystrokeLog()
+    capture = best_of(lambda: log.key(1.5, 97), 1_000_000)
+    with_capture = per_key_dispatch(KeystrokeLog())
+    without_capture = per_key_dispatch(NoCapture())
+    added = with_capture - without_capture
+
+    # A 22-key answer is captured once; each timed call rewinds the question's
+    # start (one attribute store) so end_question folds the same keys again.
+    log.begin_question(0.0)
+    for n in range(20):
+        log.key(0.5 + n * 0.2, 97)
+    log.key(4.5, BACKSPACE_CODE)
+    log.key(4.7, ENTER_CODE)
+    start = log.start
+
+    def end_question():
+        log.start = start
+        log.end_question()
+    fold = best_of(end_question, 1_000_000)
+    miss = best_of(log.question_stats, 1_000_000)
+
+    print(f"KeystrokeLog.key                  {capture * 1e6:6.3f} us per key")
+    print(f"dispatch per key, with capture    {with_capture * 1e6:6.3f} us")
+    print(f"dispatch per key, without         {without_capture * 1e6:6.3f} us  (capture adds {added * 1e6:.3f} us)")
+    print(f"end_question, 22-key answer       {fold * 1e6:6.3f} us per answer")
+    print(f"question_stats, per miss          {miss * 1e6:6.3f} us")
+    over = [name for name, cost in (("KeystrokeLog.key", capture), ("capture in dispatch", added))
+            if cost * 1e6 >= args.budget_us]
+    if over:
+        print(f"over the {args.budget_us} us budget: {', '.join(over)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+import time
+
+
+# Game time: time.monotonic() sampled once per frame, so every check in a frame
+# sees the same instant and wall-clock jumps can't stretch or skip a question.
+class FrameClock:
+    def __init__(self, source=time.monotonic):
+        self.source = source
+        self.now = source()
+        # Fixed offset to wall time, for state that outlives the process (Review Mode due dates).
+        self.epoch = time.time() - self.now
+
+    def sample(self):
+        self.now = self.source()
+        return self.now
+
+    def wall(self):
+        return self.epoch + self.now
+
+
+# Clock that only moves when told to; used by replays and tests of the core.
+class ManualClock:
+    def __init__(self, now=0.0, epoch=0.0):
+        self.now = now
+        self.epoch = epoch
+
+    def sample(self):
+        return self.now
+
+    def wall(self):
+        return self.epoch + self.now
@@ -1,17 +1,355 @@
 import csv
+import hashlib
+from bisect import bisect_right
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from collections.abc import Sequence
+from matching import normalize
+from dedupe import duplicate_ids
 
-def load_questions(filename="questions.csv"):
-    questions = []
+# Compiled question bank, stored next to each CSV as <name>.csv.qbc:
+#   header: magic, version, question count, source mtime_ns, source size, source sha1
+#   offsets: count * 4 + 1 little-endian uint32 byte offsets into the string table
+#   string table: question, answer, extra info and normalized answer for every row,
+#   UTF-8, back to back
+CACHE_SUFFIX = ".qbc"
+CACHE_MAGIC = b"QBNK"
+CACHE_VERSION = 2
+FIELDS = 4
+HEADER = struct.Struct("<4sHHIqq20s")
+
+# Near-duplicate ids of a bank, stored next to its first CSV as <name>.csv.qbd, or
+# <name>.csv.<hash of the other file names>.qbd for a merged bank:
+#   header: magic, version, source count, duplicate count
+#   sources: sha1 of each CSV in the bank, in load order
+#   duplicate ids: ascending little-endian uint32
+# Finding duplicates reads every row, so it only runs again when a source changes.
+DUPLICATES_SUFFIX = ".qbd"
+DUPLICATES_MAGIC = b"QDUP"
+DUPLICATES_VERSION = 1
+DUPLICATES_HEADER = struct.Struct("<4sHHI")
+
+
+# One bank row. id is the row's index in the loaded bank and never changes or
+# gets reused while the bank is loaded (hot reload appends and tombstones).
+# Banks hand out a fresh Question per access, so the bank itself stays compact.
+class Question:
+    __slots__ = ("id", "question", "answer", "extra_info", "_normalized_answer")
+
+    def __init__(self, id, question, answer, extra_info="", normalized_answer=None):
+        self.id = id
+        self.question = question
+        self.answer = answer
+        self.extra_info = extra_info
+        self._normalized_answer = normalized_answer
+
+    @property
+    def normalized_answer(self):
+        """The answer as graded: stored in the compiled bank, otherwise normalized on first use"""
+        if self._normalized_answer is None:
+            self._normalized_answer = normalize(self.answer)
+        return self._normalized_answer
+
+    def __repr__(self):
+        return f"Question({self.id}, {self.question!r}, {self.answer!r}, {self.extra_info!r})"
+
+
+def parse_rows(rows):
+    """Yield (question, answer, extra info) for each usable CSV row"""
+    for row in rows:
+        # Exclude sections commented out with #
+        # Expecting three columns: question, answer, extra info.
+        if not row or row[0].startswith('#'):
+            continue
+        if len(row) == 3:
+            yield (row[0], row[1], row[2])
+        elif len(row) == 2:
+            yield (row[0], row[1], "")
+
+
+def parse_questions(filename="questions.csv"):
     with open(filename, newline='', encoding='utf-8') as csvfile:
-        reader = csv.reader(csvfile)
-        for row in reader:
-            # Exclude sections commented out with #
-            # Expecting three columns: question, answer, extra info.
-            if not row or row[0].startswith('#'):
-                continue
-            if len(row) == 3:
-                questions.append((row[0], row[1], row[2]))
-            elif len(row) == 2:
-                questions.append((row[0], row[1], ""))
-    return questions
+        return list(parse_rows(csv.reader(csvfile)))
+
+
+def load_questions(filename="questions.csv"):
+    """Load a question bank through its compiled cache, rebuilding the cache if the CSV changed"""
+    cache_path = filename + CACHE_SUFFIX
+    stat = os.stat(filename)
+    try:
+        header = read_cache_header(cache_path)
+    except (OSError, ValueError):
+        header = None
+    if header is not None and (header["mtime_ns"], header["size"]) != (stat.st_mtime_ns, stat.st_size):
+        # Touched but maybe not edited: only rebuild if the content hash differs.
+        if header["size"] == stat.st_size and header["sha1"] == file_sha1(filename):
+            try:
+                write_cache_header(cache_path, header["count"], stat, header["sha1"])
+            except OSError:
+                pass
+        else:
+            header = None
+    if header is None:
+        questions = parse_questions(filename)
+        sha1 = file_sha1(filename)
+        try:
+            compile_questions(questions, cache_path, stat, sha1)
+        except OSError:
+            # Read-only install: just use the parsed rows.
+            return ColumnBank(questions, sha1)
+    return CompiledBank(cache_path)
+
+
+def file_sha1(filename):
+    digest = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def read_cache_header(cache_path):
+    with open(cache_path, 'rb') as f:
+        data = f.read(HEADER.size)
+    if len(data) != HEADER.size:
+        raise ValueError("truncated question cache")
+    magic, version, _, count, mtime_ns, size, sha1 = HEADER.unpack(data)
+    if magic != CACHE_MAGIC or version != CACHE_VERSION:
+        raise ValueError("not a question cache")
+    return {"count": count, "mtime_ns": mtime_ns, "size": size, "sha1": sha1}
+
+
+def write_cache_header(cache_path, count, stat, sha1):
+    with open(cache_path, 'r+b') as f:
+        f.write(HEADER.pack(CACHE_MAGIC, CACHE_VERSION, 0, count, stat.st_mtime_ns, stat.st_size, sha1))
+
+
+def compile_questions(questions, cache_path, stat, sha1):
+    offsets = array('I', [0])
+    table = bytearray()
+    for row in questions:
+        for field in (*row, normalize(row[1])):
+            table += field.encode('utf-8')
+            offsets.append(len(table))
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+    # Unique per process and thread, so two loaders never write the same temporary file.
+    tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(CACHE_MAGIC, CACHE_VERSION, 0, len(questions), stat.st_mtime_ns, stat.st_size, sha1))
+            f.write(offsets.tobytes())
+            f.write(table)
+        os.replace(tmp_path, cache_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# Read-only view of a compiled bank. Rows are decoded on access, so opening a
+# bank costs the same no matter how many questions it holds.
+class CompiledBank(Sequence):
+    def __init__(self, cache_path):
+        with open(cache_path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = read_cache_header(cache_path)
+        self.count = header["count"]
+        self.sha1 = header["sha1"]
+        end = HEADER.size + 4 * (self.count * FIELDS + 1)
+        if sys.byteorder == 'little':
+            self.offsets = memoryview(self.map)[HEADER.size:end].cast('I')
+        else:
+            self.offsets = array('I', self.map[HEADER.size:end])
+            self.offsets.byteswap()
+        self.table_start = end
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("question index out of range")
+        base = index * FIELDS
+        return Question(index, self.field(base), self.field(base + 1), self.field(base + 2), self.field(base + 3))
+
+    def field(self, n):
+        start = self.table_start + self.offsets[n]
+        end = self.table_start + self.offsets[n + 1]
+        return self.map[start:end].decode('utf-8')
+
+    def close(self):
+        """Unmap the cache file; Windows refuses to replace it while it is mapped"""
+        if isinstance(self.offsets, memoryview):
+            self.offsets.release()
+        self.map.close()
+
+
+# In-memory bank stored column-wise: one list per field instead of one object
+# per row. Repeated answers and extra info ("True", "Yes") share one string through
+# a table kept only while loading; sys.intern keeps an entry for every unique
+# string, and most extra info is unique.
+class ColumnBank(Sequence):
+    def __init__(self, rows=(), sha1=None):
+        # Content hash of the CSV the rows came from, if any.
+        self.sha1 = sha1
+        self.questions = []
+        self.answers = []
+        self.extra_infos = []
+        shared = {}
+        for question, answer, extra_info in rows:
+            self.append(question, shared.setdefault(answer, answer), shared.setdefault(extra_info, extra_info))
+
+    def append(self, question, answer, extra_info=""):
+        self.questions.append(question)
+        self.answers.append(answer)
+        self.extra_infos.append(extra_info)
+        return len(self.questions) - 1
+
+    def __len__(self):
+        return len(self.questions)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.questions)
+            if index < 0:
+                raise IndexError("question index out of range")
+        # The first column raises IndexError past the end.
+        return Question(index, self.questions[index], self.answers[index], self.extra_infos[index])
+
+
+def load_bank(filenames, dedupe=True):
+    """Load one or more CSV files as a single question bank, in file order"""
+    if isinstance(filenames, str):
+        filenames = [filenames]
+    banks = [load_questions(filename) for filename in filenames]
+    bank = banks[0] if len(banks) == 1 else MergedBank(banks)
+    # Later copies of near-duplicate questions are tombstoned, within a file or across
+    # files, so ids still line up with the files.
+    if dedupe:
+        path = duplicates_path(filenames)
+        sha1s = [source.sha1 for source in banks]
+        duplicates = load_duplicates(path, sha1s)
+        if duplicates is None:
+            duplicates = sorted(duplicate_ids(bank))
+            try:
+                save_duplicates(path, sha1s, duplicates)
+            except OSError:
+                pass  # read-only install: find them again next launch
+        if duplicates:
+            bank = LiveBank(bank)
+            bank.removed.update(duplicates)
+    return bank
+
+
+def duplicates_path(filenames):
+    if len(filenames) == 1:
+        return filenames[0] + DUPLICATES_SUFFIX
+    others = "\0".join(os.path.abspath(filename) for filename in filenames[1:])
+    return f"{filenames[0]}.{hashlib.sha1(others.encode('utf-8')).hexdigest()[:8]}{DUPLICATES_SUFFIX}"
+
+
+def load_duplicates(path, sha1s):
+    """Saved duplicate ids, or None if the file is missing, corrupt or for other sources"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, sources, count = DUPLICATES_HEADER.unpack_from(data)
+    except (OSError, struct.error):
+        return None
+    start = DUPLICATES_HEADER.size
+    if (magic != DUPLICATES_MAGIC or version != DUPLICATES_VERSION
+            or [data[start + 20 * i:start + 20 * (i + 1)] for i in range(sources)] != sha1s):
+        return None
+    start += 20 * sources
+    if len(data) != start + 4 * count:
+        return None
+    duplicates = array('I', data[start:])
+    if sys.byteorder != 'little':
+        duplicates.byteswap()
+    return duplicates
+
+
+def save_duplicates(path, sha1s, duplicates):
+    duplicates = array('I', duplicates)
+    if sys.byteorder != 'little':
+        duplicates.byteswap()
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(DUPLICATES_HEADER.pack(DUPLICATES_MAGIC, DUPLICATES_VERSION, len(sha1s), len(duplicates)))
+            f.write(b"".join(sha1s))
+            f.write(duplicates.tobytes())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# Several banks presented as one sequence, without copying any rows.
+class MergedBank(Sequence):
+    def __init__(self, banks):
+        self.banks = banks
+        self.starts = []
+        total = 0
+        for bank in banks:
+            self.starts.append(total)
+            total += len(bank)
+        self.count = total
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("question index out of range")
+        i = bisect_right(self.starts, index) - 1
+        question = self.banks[i][index - self.starts[i]]
+        question.id = index
+        return question
+
+
+# A bank edited while the game runs: removed rows read as None so every other
+# question keeps its id, and added rows are appended after the base bank.
+class LiveBank(Sequence):
+    def __init__(self, base):
+        self.base = base
+        self.base_count = len(base)
+        self.removed = set()
+        self.added = ColumnBank()
+
+    def __len__(self):
+        return self.base_count + len(self.added)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if index in self.removed:
+            return None
+        return self.lookup(index)
+
+    def lookup(self, index):
+        """The question with this id, even if a reload has since removed it"""
+        if index < self.base_count:
+            return self.base[index]
+        question = self.added[index - self.base_count]
+        question.id = index
+        return question
+
+    def remove(self, index):
+        self.removed.add(index)
+
+    def append(self, question, answer, extra_info=""):
+        return self.base_count + self.added.append(question, answer, extra_info)
 
+    def live_indices(self):
+        return [i for i in range(len(self)) if i not in self.removed]
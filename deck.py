@@ -0,0 +1,100 @@
+import random
+
+
+# Normal mode: deals every question once in random order before any repeats.
+# Each draw is one step of an incremental Fisher-Yates shuffle, so it is O(1).
+class ShuffleBag:
+    def __init__(self, indices, rng=None):
+        self.rng = rng or random.Random()
+        self.items = list(indices)
+        # Slot of each index, so questions can be added or dropped mid-deal.
+        self.positions = {index: i for i, index in enumerate(self.items)}
+        self.remaining = len(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def draw(self, avoid=None):
+        """Return the next question index, never avoid unless it is the only choice"""
+        if not self.items:
+            raise IndexError("draw from an empty question bag")
+        if self.remaining == 0:
+            self.remaining = len(self.items)
+        j = self.rng.randrange(self.remaining)
+        if self.items[j] == avoid and self.remaining > 1:
+            j = (j + 1 + self.rng.randrange(self.remaining - 1)) % self.remaining
+        last = self.remaining - 1
+        self.swap(j, last)
+        self.remaining = last
+        return self.items[last]
+
+    def swap(self, i, j):
+        items = self.items
+        items[i], items[j] = items[j], items[i]
+        self.positions[items[i]] = i
+        self.positions[items[j]] = j
+
+    def add(self, index):
+        """Add a question to the part of the bag still to be dealt"""
+        if index in self.positions:
+            return
+        self.positions[index] = len(self.items)
+        self.items.append(index)
+        self.swap(self.remaining, len(self.items) - 1)
+        self.remaining += 1
+
+    def discard(self, index):
+        position = self.positions.get(index)
+        if position is None:
+            return
+        if position < self.remaining:
+            # Keep the undealt part contiguous: move the question to its end first.
+            self.swap(position, self.remaining - 1)
+            self.remaining -= 1
+            position = self.remaining
+        self.swap(position, len(self.items) - 1)
+        self.items.pop()
+        del self.positions[index]
+
+
+# Clear Mode: questions not yet answered correctly. Retiring one swaps the
+# last entry into its slot, so draw and retire are both O(1).
+class ClearPool:
+    def __init__(self, indices, rng=None):
+        self.rng = rng or random.Random()
+        self.items = list(indices)
+        self.positions = {index: i for i, index in enumerate(self.items)}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, index):
+        return index in self.positions
+
+    def draw(self, avoid=None):
+        """Return a random remaining question index, never avoid unless it is the only one left"""
+        n = len(self.items)
+        if not n:
+            raise IndexError("draw from an empty clear pool")
+        skip = self.positions.get(avoid)
+        if skip is None or n == 1:
+            return self.items[self.rng.randrange(n)]
+        # Uniform over the other n - 1 slots.
+        j = self.rng.randrange(n - 1)
+        if j >= skip:
+            j += 1
+        return self.items[j]
+
+    def add(self, index):
+        if index not in self.positions:
+            self.positions[index] = len(self.items)
+            self.items.append(index)
+
+    def retire(self, index):
+        position = self.positions.pop(index, None)
+        if position is None:
+            return
+        last = self.items.pop()
+        if last != index:
+            self.items[position] = last
+            self.positions[last] = position
@@ -0,0 +1,187 @@
+"""Find questions that say the same thing with the same answer, within or across banks.
+
+Run from the repository root:
+    python dedupe.py [questions.csv ...] [--threshold 0.85]
+
+Every question gets a MinHash signature of its text, and an LSH index over the
+signatures proposes candidate pairs in near-linear time. Each candidate is
+confirmed with the game's edit-distance similarity on the question and answer
+grading on the answer (each must be accepted for the other), and confirmed
+pairs are joined into clusters. load_bank keeps the first question of each
+cluster, whether the bank is one file or several merged, and saves the ids it
+drops next to the first CSV so they are only found again when a CSV changes.
+"""
+import argparse
+import sys
+import zlib
+from matching import answer_key, normalize, similarity
+
+# Question text similarity two rows need, on top of interchangeable answers.
+DUPLICATE_THRESHOLD = 0.85
+SHINGLE = 4
+# One-permutation MinHash: each shingle hash picks one of 64 bins by its top six
+# bits and the bin keeps its smallest remaining value, so a signature costs one
+# hash per shingle instead of one per bin. The bins are read as 16 LSH bands of
+# 4; two texts whose shingle sets have Jaccard similarity s share a band with
+# probability 1 - (1 - s^4)^16: about 0.64 at s = 0.5, 0.97 at 0.7.
+BIN_BITS = 6
+BINS = 1 << BIN_BITS
+BANDS = 16
+ROWS = BINS // BANDS
+VALUE_BITS = 32 - BIN_BITS
+EMPTY = 1 << 32
+# A bucket this full (templated questions like "Port for LDAP?") is not paired
+# all-against-all. Its rows are sorted by their text, then by their text read
+# backwards, and each is paired with the next WINDOW rows in either order: a
+# copy edited anywhere but at both ends still sorts next to its original.
+CROWDED = 64
+WINDOW = 8
+
+
+def shingle_hashes(text):
+    data = text.encode("utf-8")
+    if len(data) <= SHINGLE:
+        return [zlib.crc32(data) * 0x9E3779B1 & 0xFFFFFFFF] if data else []
+    # crc32 is cheap but its low bits are poorly mixed; the multiply spreads them upwards.
+    return [zlib.crc32(data[i:i + SHINGLE]) * 0x9E3779B1 & 0xFFFFFFFF for i in range(len(data) - SHINGLE + 1)]
+
+
+def signature(text):
+    """MinHash signature of normalized text as a list of BINS values, or None for empty text"""
+    hashes = shingle_hashes(text)
+    if not hashes:
+        return None
+    mins = [EMPTY] * BINS
+    mask = (1 << VALUE_BITS) - 1
+    for h in hashes:
+        b = h >> VALUE_BITS
+        v = h & mask
+        if v < mins[b]:
+            mins[b] = v
+    if EMPTY in mins:
+        # Densification: an empty bin borrows the next filled bin to its right, offset by
+        # the distance so that borrowed values only match when two texts borrowed alike.
+        filled = mins[:]
+        for b in range(BINS):
+            if filled[b] == EMPTY:
+                t = 1
+                while filled[(b + t) % BINS] == EMPTY:
+                    t += 1
+                mins[b] = filled[(b + t) % BINS] + (t << VALUE_BITS)
+    return mins
+
+
+def candidate_pairs(signatures, texts):
+    """(i, j) pairs sharing at least one LSH band, from (id, signature) pairs; each pair once, i < j"""
+    pairs = set()
+    for band in range(BANDS):
+        lo = band * ROWS
+        buckets = {}
+        for question_id, sig in signatures:
+            buckets.setdefault(tuple(sig[lo:lo + ROWS]), []).append(question_id)
+        for ids in buckets.values():
+            if len(ids) > CROWDED:
+                for key in (texts.__getitem__, lambda i: texts[i][::-1]):
+                    ordered = sorted(ids, key=key)
+                    for n, i in enumerate(ordered):
+                        for j in ordered[n + 1:n + 1 + WINDOW]:
+                            pairs.add((i, j) if i < j else (j, i))
+                continue
+            for n, i in enumerate(ids):
+                for j in ids[n + 1:]:
+                    pairs.add((i, j))
+    return pairs
+
+
+def same_answer(a, b):
+    # Exact acceptance, not the close-answer threshold: "crontab -l" and "crontab -r" differ.
+    return (answer_key(a.answer, a.extra_info).similarity(b.answer) == 1.0
+            or answer_key(b.answer, b.extra_info).similarity(a.answer) == 1.0)
+
+
+# Union-find over question ids. The root of a set is always its smallest id,
+# which is the copy a merged bank keeps.
+class Clusters:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, i):
+        parent = self.parent
+        parent.setdefault(i, i)
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i, j):
+        i, j = self.find(i), self.find(j)
+        if i != j:
+            self.parent[max(i, j)] = min(i, j)
+
+    def groups(self):
+        groups = {}
+        for i in self.parent:
+            groups.setdefault(self.find(i), []).append(i)
+        return sorted(sorted(ids) for ids in groups.values() if len(ids) > 1)
+
+
+def find_duplicates(questions, threshold=DUPLICATE_THRESHOLD):
+    """Clusters of near-duplicate question ids, each sorted with the copy to keep first.
+
+    questions is any bank; rows a reload removed (None) are skipped.
+    """
+    texts = {}
+    signatures = []
+    for question_id, question in enumerate(questions):
+        if question is None:
+            continue
+        text = normalize(question.question)
+        sig = signature(text)
+        if sig is not None:
+            texts[question_id] = text
+            signatures.append((question_id, sig))
+    clusters = Clusters()
+    for i, j in sorted(candidate_pairs(signatures, texts)):
+        # Already joined through another pair: nothing to confirm.
+        if clusters.find(i) == clusters.find(j):
+            continue
+        if similarity(texts[i], texts[j], threshold) >= threshold and same_answer(questions[i], questions[j]):
+            clusters.union(i, j)
+    return clusters.groups()
+
+
+def duplicate_ids(questions, threshold=DUPLICATE_THRESHOLD):
+    """Ids of every near-duplicate question except the first of its cluster"""
+    return {question_id for cluster in find_duplicates(questions, threshold) for question_id in cluster[1:]}
+
+
+def main(argv=None):
+    from data_loader import load_bank
+
+    parser = argparse.ArgumentParser(description="Report near-duplicate questions across question banks")
+    parser.add_argument("banks", metavar="CSV", nargs="*", help="question files, merged in order (default: questions.csv)")
+    parser.add_argument("--threshold", type=float, default=DUPLICATE_THRESHOLD,
+                        help=f"question text similarity for a duplicate (default {DUPLICATE_THRESHOLD})")
+    args = parser.parse_args(argv)
+    banks = args.banks or ["questions.csv"]
+    questions = load_bank(banks, dedupe=False)
+    starts = getattr(questions, "starts", [0])
+
+    def where(question_id):
+        n = max(i for i, start in enumerate(starts) if start <= question_id)
+        return f"{banks[n]} #{question_id - starts[n] + 1}"
+
+    clusters = find_duplicates(questions, args.threshold)
+    for cluster in clusters:
+        for n, question_id in enumerate(cluster):
+            question = questions[question_id]
+            marker = "keep" if n == 0 else "drop"
+            print(f"{marker}  {where(question_id):28} {question.question[:70]}  ->  {question.answer.strip()[:25]}")
+        print()
+    dropped = sum(len(cluster) - 1 for cluster in clusters)
+    print(f"{len(questions)} questions, {len(clusters)} duplicate clusters, {dropped} duplicates")
+    return 1 if clusters else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
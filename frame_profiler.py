@@ -0,0 +1,108 @@
+import cProfile
+import csv
+import io
+import json
+import pstats
+import time
+from array import array
+
+# Frame phases in main-loop order. WAIT is time blocked in the scheduler and is
+# not counted as frame work.
+PHASES = ("wait", "events", "input", "update", "draw", "present")
+WAIT, EVENTS, INPUT, UPDATE, DRAW, PRESENT = range(len(PHASES))
+
+
+# Per-phase frame timings in a fixed-size ring buffer. mark(phase) charges the
+# time since the previous mark to that phase, so instrumenting the loop costs
+# one perf_counter call and one array update per mark.
+class FrameProfiler:
+    def __init__(self, capacity=600, budget=1 / 60):
+        self.capacity = capacity
+        self.budget = budget
+        self.durations = array('d', bytes(8 * capacity * len(PHASES)))
+        self.starts = array('d', bytes(8 * capacity))
+        self.frames = 0
+        self.dropped = 0
+        self.base = 0
+        self.frame_start = self.last = time.perf_counter()
+        self.profile = None
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.durations[self.base + phase] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        slot = self.frames % self.capacity
+        if self.work(slot) > self.budget:
+            self.dropped += 1
+        self.starts[slot] = self.frame_start
+        self.frames += 1
+        self.base = (self.frames % self.capacity) * len(PHASES)
+        for i in range(len(PHASES)):
+            self.durations[self.base + i] = 0.0
+        self.frame_start = self.last
+
+    def work(self, slot):
+        base = slot * len(PHASES)
+        return sum(self.durations[base + WAIT + 1:base + len(PHASES)])
+
+    def recorded_slots(self):
+        """Ring slots of the recorded frames, oldest first"""
+        count = min(self.frames, self.capacity)
+        first = self.frames - count
+        return [(first + i) % self.capacity for i in range(count)]
+
+    def stats(self):
+        """p50/p99 frame work time in seconds, plus frame and dropped-frame counts"""
+        work = sorted(self.work(slot) for slot in self.recorded_slots())
+        if not work:
+            return {"p50": 0.0, "p99": 0.0, "frames": 0, "dropped": 0}
+        return {
+            "p50": work[len(work) // 2],
+            "p99": work[min(len(work) - 1, int(len(work) * 0.99))],
+            "frames": self.frames,
+            "dropped": self.dropped,
+        }
+
+    def overlay_lines(self):
+        stats = self.stats()
+        return (f"frame p50 {stats['p50'] * 1000:.2f} ms  p99 {stats['p99'] * 1000:.2f} ms",
+                f"dropped {stats['dropped']} / {stats['frames']}",
+                f"F7 export  F6 cProfile {'on' if self.profile else 'off'}")
+
+    def export_csv(self, path):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(("frame_start_s",) + tuple(f"{phase}_ms" for phase in PHASES))
+            for slot in self.recorded_slots():
+                base = slot * len(PHASES)
+                writer.writerow([f"{self.starts[slot]:.6f}"] + [f"{d * 1000:.4f}" for d in self.durations[base:base + len(PHASES)]])
+
+    def export_chrome_trace(self, path):
+        # Phases are laid end to end from each frame's start; events and input
+        # actually interleave per event, so treat their order as approximate.
+        events = []
+        for slot in self.recorded_slots():
+            ts = self.starts[slot] * 1e6
+            base = slot * len(PHASES)
+            for i, phase in enumerate(PHASES):
+                dur = self.durations[base + i] * 1e6
+                if dur:
+                    events.append({"name": phase, "ph": "X", "ts": round(ts, 1), "dur": round(dur, 1), "pid": 1, "tid": 1})
+                ts += dur
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def toggle_cprofile(self, path):
+        """Start a cProfile capture, or stop the running one and save it to path; returns a summary when stopping"""
+        if self.profile is None:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+            return None
+        profile, self.profile = self.profile, None
+        profile.disable()
+        profile.dump_stats(path)
+        summary = io.StringIO()
+        pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(20)
+        return summary.getvalue()
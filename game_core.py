@@ -0,0 +1,440 @@
+import random
+from concurrent.futures import Future
+from clock import FrameClock
+from data_loader import load_questions, ColumnBank, LiveBank
+from deck import ShuffleBag, ClearPool
+from utils import get_documents_folder
+from matching import answer_key, normalize, SIMILARITY_THRESHOLD
+from sound_manager import NullSoundManager
+from journal import write_report, report_entry, report_path
+from question_index import QuestionIndex, parse_query, matches
+from spaced_repetition import ReviewDeck, ReviewStore, question_key, QUALITY_CORRECT, QUALITY_CLOSE, QUALITY_WRONG
+from telemetry import KeystrokeLog, BACKSPACE_CODE, ENTER_CODE
+
+# Abstract input events, fed to GameCore.dispatch as (kind, value) tuples.
+TEXT = "text"            # value: typed characters
+BACKSPACE = "backspace"
+SUBMIT = "submit"
+PAUSE = "pause"          # toggles pause/resume
+START = "start"          # value: (mode, game_length, question_time, question_filter)
+MENU = "menu"
+
+
+def score_answer(similarity, streak):
+    """Scoring rules: (points, new streak, multiplier) for an answer given the streak before it"""
+    if similarity < SIMILARITY_THRESHOLD:
+        return 0, 0, 1
+    streak += 1
+    multiplier = 1
+    if streak >= 3:
+        multiplier = streak - 1
+    if similarity == 1.0:
+        return 10 * multiplier, streak, multiplier
+    # Close enough: half points, and the streak carries on.
+    return int((10 * multiplier) / 2), streak, multiplier
+
+
+# Game state machine with no pygame dependency. TypingGame adds the window,
+# fonts and pygame event translation on top; benchmarks and tools drive it directly.
+class GameCore:
+    def __init__(self, questions=None, sound_manager=None, default_game_length=180, default_question_time=15, seed=None, journal=None, review_store=None, clock=None, question_index=None):
+        self.state = "menu"
+        self.pause_start = None
+        # questions may be a Future from a loader thread; it is resolved the first time it's needed.
+        self.questions_future = None
+        if questions is None:
+            questions = load_questions()
+        elif isinstance(questions, Future):
+            self.questions_future, questions = questions, ColumnBank()
+        elif isinstance(questions, list):
+            # Plain (question, answer, extra info) rows, e.g. from a benchmark.
+            questions = ColumnBank(questions)
+        self._questions = questions
+        # Like questions, may be a Future; built in memory from the bank if none is given.
+        self._question_index = question_index
+        self.question_filter = ""
+        self.bag_filter = ""
+        # Why the last start or restart didn't begin a game, for the menu.
+        self.start_error = ""
+        self.rng = random.Random(seed)
+        self.question_bag = None
+        self.available_questions = ClearPool((), self.rng)
+        self.game_mode = "normal"
+        self.score = 0
+        self.start_time = None
+        self.question_timer = 0
+        self.current_index = None
+        self.current_question = None
+        self.user_input = ""
+        self.game_length = default_game_length
+        self.question_time = default_question_time
+        self.time_left = self.game_length
+        self.feedback = ""
+        self.feedback_color = (255, 255, 255)
+        self.feedback_timer = 0
+        self.last_question_answer = ""
+        self.last_question_info = ""
+        self.learning_mode = False
+        self.sound_enabled = True
+        self.correct_streak = 0
+        self.questions_answered = 0
+        self.questions_correct = 0
+        self.clear_mode_correct = 0
+        # (question id, typed answer, TypingStats or None) per miss; the text is looked up when a report is written.
+        self.wrong_answers = []
+        self.wrong_answers_file = None
+        self.sound_manager = sound_manager or NullSoundManager()
+        self.journal = journal
+        self.review_store = review_store
+        self.review_deck = None
+        # question_key by question id, shared by every Review Mode deck over this bank.
+        self.review_keys = {}
+        # Sampled once per frame by the main loop (or driven directly by a replay).
+        self.clock = clock or FrameClock()
+        self.recorder = None
+        # Optional AnalyticsStore; session_stats is filled in from its thread after game over.
+        self.analytics = None
+        self.session_stats = None
+        self.keystrokes = KeystrokeLog()
+
+    @property
+    def questions(self):
+        if self.questions_future is not None:
+            self._questions = self.questions_future.result()
+            self.questions_future = None
+        return self._questions
+
+    @questions.setter
+    def questions(self, questions):
+        self.questions_future = None
+        self._questions = questions
+
+    @property
+    def question_index(self):
+        if isinstance(self._question_index, Future):
+            self._question_index = self._question_index.result()
+        if self._question_index is None:
+            self._question_index = QuestionIndex.build(self.questions)
+        return self._question_index
+
+    def dispatch(self, event):
+        if self.recorder is not None:
+            self.recorder.event(self.clock.now, event)
+        kind, value = event
+        if kind == TEXT:
+            self.type_text(value)
+        elif kind == BACKSPACE:
+            self.backspace()
+        elif kind == SUBMIT:
+            self.submit_answer()
+        elif kind == PAUSE:
+            if self.state == "playing":
+                self.pause()
+            elif self.state == "paused":
+                self.resume()
+        elif kind == START:
+            self.start(*value)
+        elif kind == MENU:
+            self.state = "menu"
+
+    def pause(self):
+        if self.state == "playing":
+            self.state = "paused"
+            self.pause_start = self.clock.now
+
+    def resume(self):
+        if self.state == "paused":
+            delta = self.clock.now - self.pause_start
+            self.start_time += delta
+            self.question_timer += delta
+            self.feedback_timer += delta
+            self.keystrokes.resume(delta)
+            self.state = "playing"
+
+    def start(self, mode, game_length=None, question_time=None, question_filter=None):
+        self.game_mode = mode
+        if question_filter is not None:
+            self.question_filter = question_filter
+        self.reset_game(game_length, question_time)
+
+    def reset_game(self, game_length=None, question_time=None):
+        if game_length is not None:
+            self.game_length = game_length
+        if question_time is not None:
+            self.question_time = question_time
+        self.start_error = ""
+        if self.game_mode == "clear":
+            indices = self.filtered_indices()
+            if not indices:
+                self.no_questions()
+                return
+            self.available_questions = ClearPool(indices, self.rng)
+        elif self.game_mode == "review":
+            if self.review_store is None:
+                self.review_store = ReviewStore()
+            self.review_deck = ReviewDeck(self.questions, self.review_store, self.rng, self.review_keys)
+        else:
+            indices = self.filtered_indices()
+            if not indices:
+                self.no_questions()
+                return
+            if self.question_bag is None or self.bag_filter != self.question_filter or len(self.question_bag) != len(indices):
+                self.question_bag = ShuffleBag(indices, self.rng)
+                self.bag_filter = self.question_filter
+        self.score = 0
+        self.start_time = self.clock.now
+        self.time_left = self.game_length
+        self.user_input = ""
+        self.feedback = ""
+        self.feedback_timer = 0
+        self.last_question_answer = ""
+        self.last_question_info = ""
+        self.correct_streak = 0
+        self.questions_answered = 0
+        self.questions_correct = 0
+        self.clear_mode_correct = 0
+        self.wrong_answers = []
+        self.session_stats = None
+        self.keystrokes.reset()
+        if self.journal is not None:
+            self.journal.begin_session()
+        if self.analytics is not None:
+            self.analytics.begin_session(self.game_mode, self.clock.wall())
+        self.next_question()
+        self.state = "playing"
+
+    def question_by_id(self, question_id):
+        if isinstance(self.questions, LiveBank):
+            return self.questions.lookup(question_id)
+        return self.questions[question_id]
+
+    def no_questions(self):
+        # Nothing to play: back to the menu, which shows why.
+        if parse_query(self.question_filter):
+            self.start_error = "No questions match the topic filter"
+        else:
+            self.start_error = "No questions to play"
+        self.state = "menu"
+
+    def live_indices(self):
+        if isinstance(self.questions, LiveBank):
+            return self.questions.live_indices()
+        return range(len(self.questions))
+
+    def filtered_indices(self, question_filter=None):
+        """Live question indices matching question_filter (Normal and Clear Mode only play these)"""
+        terms = parse_query(self.question_filter if question_filter is None else question_filter)
+        if not terms:
+            return self.live_indices()
+        index = self.question_index
+        removed = self.questions.removed if isinstance(self.questions, LiveBank) else ()
+        indices = [i for i in index.search(terms) if i not in removed]
+        # Rows a reload added after the index was built.
+        for i in range(index.count, len(self.questions)):
+            question = self.questions[i]
+            if question is not None and matches(question, terms):
+                indices.append(i)
+        return indices
+
+    def apply_bank_changes(self, removed, added):
+        """Apply one BankWatcher diff: removed question ids and (id, CSV row) additions"""
+        if not isinstance(self.questions, LiveBank):
+            self.questions = LiveBank(self.questions)
+        # The question on screen stays playable; it just won't be drawn again.
+        for index in removed:
+            self.questions.remove(index)
+            if self.question_bag is not None:
+                self.question_bag.discard(index)
+            self.available_questions.retire(index)
+            if self.review_deck is not None:
+                self.review_deck.discard(index)
+        in_game = self.state in ("playing", "paused")
+        for index, row in added:
+            if self.questions.append(*row) != index:
+                raise ValueError("question bank out of step with its watcher")
+            question = self.questions[index]
+            if self.question_bag is not None and matches(question, parse_query(self.bag_filter)):
+                self.question_bag.add(index)
+            if in_game and self.game_mode == "clear" and matches(question, parse_query(self.question_filter)):
+                self.available_questions.add(index)
+            if self.review_deck is not None:
+                self.review_deck.add(index, question)
+
+    def save_wrong_answers(self):
+        if not self.wrong_answers:
+            return None
+        docs_folder = get_documents_folder()
+        docs_folder.mkdir(exist_ok=True)
+        filepath = report_path(docs_folder)
+        entries = [report_entry(self.question_by_id(question_id), user_answer, typing)
+                   for question_id, user_answer, typing in self.wrong_answers]
+        try:
+            write_report(filepath, entries)
+            return str(filepath)
+        except Exception as e:
+            print(f'Error saving wrong answers: {e}')
+            return None
+
+    def end_game(self):
+        if self.journal is not None:
+            # The journal's writer thread turns the session's misses into the report and
+            # fills in wrong_answers_file once it is written, like session_stats below.
+            self.wrong_answers_file = None
+            self.journal.finish(lambda path: setattr(self, "wrong_answers_file", path))
+        else:
+            self.wrong_answers_file = self.save_wrong_answers()
+        if self.analytics is not None:
+            # A plain attribute swap from the analytics thread, like the sound manager's.
+            self.analytics.end_session(self.score, self.clock.wall(), lambda stats: setattr(self, "session_stats", stats))
+        self.state = "game_over"
+
+    def next_question(self):
+        if self.current_question is not None:
+            self.last_question_answer = self.current_question.answer
+            self.last_question_info = self.current_question.extra_info
+        if self.game_mode == "clear":
+            if not self.available_questions:
+                self.end_game()
+                return
+            self.current_index = self.available_questions.draw(self.current_index)
+        elif self.game_mode == "review":
+            self.current_index = self.review_deck.draw(self.current_index, self.clock.wall())
+        else:
+            self.current_index = self.question_bag.draw(self.current_index)
+        self.current_question = self.questions[self.current_index]
+        self.keystrokes.begin_question(self.clock.now)
+        self.question_timer = self.clock.now + self.question_time
+        self.user_input = ""
+        self.feedback_timer = self.clock.now + self.question_time
+
+    def question_bar_width(self):
+        remaining = max(0, self.question_timer - self.clock.now)
+        return int(710 * remaining / self.question_time)
+
+    def update(self):
+        if self.state != "playing":
+            return
+        self.time_left = self.game_length - int(self.clock.now - self.start_time)
+        if self.time_left <= 0:
+            self.record_tick()
+            self.end_game()
+        elif self.clock.now > self.question_timer:
+            self.record_tick()
+            self.questions_answered += 1
+            self.feedback = "Pass"
+            self.feedback_color = (255, 255, 255)
+            self.correct_streak = 0
+            self.keystrokes.end_question()
+            self.record_wrong_answer('(No answer - time expired)', self.keystrokes.question_stats())
+            self.record_answer(None, 0.0)
+            self.grade_review(QUALITY_WRONG)
+            self.next_question()
+
+    def record_tick(self):
+        # Updates that change state are the only ones a replay needs to re-run.
+        if self.recorder is not None:
+            self.recorder.tick(self.clock.now)
+
+    def next_frame_delay(self):
+        """Seconds until something on screen changes by itself, or None when only input can change it"""
+        if self.state != "playing":
+            return None
+        now = self.clock.now
+        remaining = self.question_timer - now
+        # Next one-pixel step of the question timer bar, or the question timeout itself.
+        delay = remaining - self.question_bar_width() * self.question_time / 710
+        if delay <= 0:
+            delay = remaining
+        delay = min(delay, 1 - (now - self.start_time) % 1)
+        if self.feedback and now < self.feedback_timer:
+            delay = min(delay, self.feedback_timer - now)
+        return max(delay, 0)
+
+    def type_text(self, text):
+        if self.state == "playing" and text:
+            self.user_input += text
+            if len(text) == 1:
+                self.keystrokes.key(self.clock.now, ord(text))
+            else:
+                self.keystrokes.run(self.clock.now, len(text))
+
+    def backspace(self):
+        if self.state == "playing":
+            self.user_input = self.user_input[:-1]
+            self.keystrokes.key(self.clock.now, BACKSPACE_CODE)
+
+    def typing_stats(self):
+        """This game's TypingStats, or None before any question has been typed at"""
+        stats = self.keystrokes.session
+        return stats if stats.questions else None
+
+    def record_wrong_answer(self, user_answer, typing=None):
+        self.wrong_answers.append((self.current_question.id, user_answer, typing))
+        if self.journal is not None:
+            self.journal.record(self.current_question, user_answer, typing)
+
+    def record_answer(self, user_answer, similarity):
+        """Send one answer to the analytics store; user_answer None means the question timed out"""
+        if self.analytics is None:
+            return
+        if user_answer is None:
+            result, credit = "timeout", 0.0
+        elif similarity == 1.0:
+            result, credit = "correct", 1.0
+        elif similarity >= SIMILARITY_THRESHOLD:
+            result, credit = "close", 0.5
+        else:
+            result, credit = "incorrect", 0.0
+        question, answer = self.current_question.question, self.current_question.answer
+        # Shown at question_timer - question_time; resume() moves question_timer past any pause.
+        latency = self.clock.now - (self.question_timer - self.question_time)
+        self.analytics.record(question_key(question, answer), question, answer, user_answer, result, credit,
+                              latency, self.correct_streak, self.game_mode, self.clock.wall())
+
+    def grade_review(self, quality):
+        if self.game_mode == "review":
+            self.review_deck.grade(self.current_index, quality, self.clock.wall())
+
+    def submit_answer(self):
+        if self.state != "playing":
+            return
+        self.questions_answered += 1
+        self.keystrokes.key(self.clock.now, ENTER_CODE)
+        self.keystrokes.end_question()
+        question = self.current_question
+        if normalize(self.user_input) == question.normalized_answer:
+            similarity = 1.0
+        else:
+            similarity = answer_key(question.answer, question.extra_info).similarity(self.user_input)
+        points, self.correct_streak, multiplier = score_answer(similarity, self.correct_streak)
+        self.score += points
+        self.record_answer(self.user_input, similarity)
+        if similarity == 1.0:
+            self.questions_correct += 1
+            if self.game_mode == "clear":
+                self.clear_mode_correct += 1
+                self.available_questions.retire(self.current_index)
+            self.feedback = f"Correct x{multiplier}"
+            self.feedback_color = (0, 255, 0)
+            self.grade_review(QUALITY_CORRECT)
+            if self.sound_enabled:
+                self.sound_manager.play_correct()
+        else:
+            if similarity >= SIMILARITY_THRESHOLD:
+                self.questions_correct += 0.5
+                if self.game_mode == "clear":
+                    self.clear_mode_correct += 1
+                    self.available_questions.retire(self.current_index)
+                self.feedback = f"Close! - half points! x{multiplier}"
+                self.feedback_color = (255, 225, 0)
+                self.grade_review(QUALITY_CLOSE)
+                if self.sound_enabled:
+                    self.sound_manager.play_correct()
+            else:
+                self.feedback = "Incorrect"
+                self.feedback_color = (255, 0, 0)
+                self.record_wrong_answer(self.user_input.strip(), self.keystrokes.question_stats())
+                self.grade_review(QUALITY_WRONG)
+                if self.sound_enabled:
+                    self.sound_manager.play_wrong()
+        self.next_question()
@@ -1,329 +1,270 @@
-import random
-import time
 import os
-from datetime import datetime
-from ui_helpers import draw_text, draw_wrapped_text, button, TextInputBox
-from data_loader import load_questions
-from utils import calculate_similarity, get_documents_folder
-
-class TypingGame:
-    def __init__(self, sound_manager, font, screen, default_game_length=180, default_question_time=15):
-        self.state = "menu"
-        self.pause_start = None
-        self.questions = load_questions()
-        self.available_questions = []
-        self.game_mode = "normal"
-        self.score = 0
-        self.start_time = None
-        self.question_timer = 0
-        self.current_question = None
-        self.user_input = ""
-        self.game_length = default_game_length
-        self.question_time = default_question_time
-        self.time_left = self.game_length
-        self.feedback = ""
-        self.feedback_color = (255, 255, 255)
-        self.feedback_timer = 0
-        self.last_question_answer = ""
-        self.last_question_info = ""
-        self.learning_mode = False
-        self.sound_enabled = True
-        self.correct_streak = 0
-        self.questions_answered = 0
-        self.questions_correct = 0
-        self.clear_mode_correct = 0
-        self.wrong_answers = []
-        self.wrong_answers_file = None
-        self.sound_manager = sound_manager
+import pygame
+from concurrent.futures import Future
+from ui_helpers import draw_text, draw_wrapped_text, render_text, wrap_text, wrapped_height, button, TextInputBox
+from renderer import Renderer
+from game_core import GameCore, TEXT, BACKSPACE, SUBMIT, START, MENU
+from question_index import parse_query
+
+# Labels first drawn after the menu; the startup warm-up renders these into the text cache.
+WARM_UP_TEXT = (
+    ("F11 > Sound: Off", (255, 255, 255)),
+    ("F12 > Learning Mode: On", (255, 255, 255)),
+    ("> ", (255, 255, 255)),
+    ("Score: 0", (255, 255, 255)),
+    ("Correct: 0%", (255, 255, 255)),
+    ("Pass", (255, 255, 255)),
+    ("Incorrect", (255, 0, 0)),
+    ("Correct x1", (0, 255, 0)),
+    ("PAUSED – press F9 to resume", (255, 255, 0)),
+    ("Game Over", (255, 255, 255)),
+    ("Restart", (255, 255, 255)),
+    ("Main Menu", (255, 255, 255)),
+)
+
+
+def seconds_setting(text, default):
+    """Whole seconds typed into a menu box, or default unless it is a positive number"""
+    try:
+        value = int(text)
+    except ValueError:
+        return default
+    # Recordings store both settings as unsigned 32-bit values.
+    return value if 0 < value < 2 ** 32 else default
+
+
+class TypingGame(GameCore):
+    def __init__(self, sound_manager, font, screen, default_game_length=180, default_question_time=15, seed=None, questions=None, renderer=None, journal=None, review_store=None, clock=None, question_index=None):
+        super().__init__(questions, sound_manager, default_game_length, default_question_time, seed, journal, review_store, clock, question_index)
         self.font = font
         self.screen = screen
+        self.renderer = renderer or Renderer(screen)
         self.input_box_game_length = TextInputBox(300, 300, 200, 40, str(default_game_length), font)
         self.input_box_question_time = TextInputBox(300, 370, 200, 40, str(default_question_time), font)
+        self.input_box_filter = TextInputBox(300, 200, 200, 40, "", font)
+        self.small_font = pygame.font.Font(None, 24)
+        # (filter text, status line) for the last filter typed, so the index is queried once per edit.
+        self.filter_status_cache = ("", "")
 
-    def pause(self):
-        if self.state == "playing":
-            self.state = "paused"
-            self.pause_start = time.time()
-
-    def resume(self):
-        if self.state == "paused":
-            delta = time.time() - self.pause_start
-            self.start_time += delta
-            self.question_timer += delta
-            self.feedback_timer += delta
-            self.state = "playing"
-
-    def reset_game(self):
-        try:
-            self.game_length = int(self.input_box_game_length.text)
-        except ValueError:
-            self.game_length = 180
-        try:
-            self.question_time = int(self.input_box_question_time.text)
-        except ValueError:
-            self.question_time = 15
-        if self.game_mode == "clear":
-            self.available_questions = self.questions.copy()
-        self.score = 0
-        self.start_time = time.time()
-        self.time_left = self.game_length
-        self.user_input = ""
-        self.feedback = ""
-        self.feedback_timer = 0
-        self.last_question_answer = ""
-        self.last_question_info = ""
-        self.correct_streak = 0
-        self.questions_answered = 0
-        self.questions_correct = 0
-        self.clear_mode_correct = 0
-        self.wrong_answers = []
-        self.next_question()
-        self.state = "playing"
-
-    def save_wrong_answers(self):
-        if not self.wrong_answers:
-            return None
-        now = datetime.now()
-        date_str = now.strftime('%Y%m%d')
-        time_str = now.strftime('%H%M%S')
-        filename = f'WrongAnswers{date_str}{time_str}.txt'
-        docs_folder = get_documents_folder()
-        docs_folder.mkdir(exist_ok=True)
-        filepath = docs_folder / filename
-        try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write('Wrong Answers Report\n')
-                f.write('=' * 50 + '\n\n')
-                for i, entry in enumerate(self.wrong_answers, 1):
-                    f.write(f'Question {i}:\n')
-                    f.write(f'Q: {entry["question"]}\n')
-                    f.write(f'Correct Answer: {entry["correct_answer"]}\n')
-                    f.write(f'Your Answer: {entry["user_answer"]}\n')
-                    if entry['extra_info']:
-                        f.write(f'Extra Info: {entry["extra_info"]}\n')
-                    f.write('\n' + '-' * 30 + '\n\n')
-                f.write(f'Total Wrong Answers: {len(self.wrong_answers)}\n')
-            return str(filepath)
-        except Exception as e:
-            print(f'Error saving wrong answers: {e}')
-            return None
-
-    def next_question(self):
-        if self.current_question is not None:
-            self.last_question_answer = self.current_question[1]
-            self.last_question_info = self.current_question[2]
-        if self.game_mode == "clear":
-            if not self.available_questions:
-                self.wrong_answers_file = self.save_wrong_answers()
-                self.state = "game_over"
-                return
-            if len(self.available_questions) > 1:
-                new_question = random.choice(self.available_questions)
-                while self.current_question is not None and new_question == self.current_question:
-                    new_question = random.choice(self.available_questions)
-                self.current_question = new_question
-            else:
-                self.current_question = self.available_questions[0]
-        else:
-            if len(self.questions) > 1:
-                new_question = random.choice(self.questions)
-                while self.current_question is not None and new_question == self.current_question:
-                    new_question = random.choice(self.questions)
-                self.current_question = new_question
-            else:
-                self.current_question = random.choice(self.questions)
-        self.question_timer = time.time() + self.question_time
-        self.user_input = ""
-        self.feedback_timer = time.time() + self.question_time
+    def menu_boxes(self):
+        """Menu input boxes in Tab order"""
+        return (self.input_box_game_length, self.input_box_question_time, self.input_box_filter)
 
-    def draw_question_timer_bar(self):
-        if self.state == "playing" and self.current_question:
-            total = self.question_time
-            remaining = max(0, self.question_timer - time.time())
-            fraction = remaining / total
-            bar_width = int(710 * fraction)
-            import pygame
-            pygame.draw.rect(self.screen, (100, 100, 100), (40, 170, 710, 10))
-            pygame.draw.rect(self.screen, (0, 200, 0), (40, 170, bar_width, 10))
-
-    def draw_all_information(self):
-        import pygame
-        if self.feedback and time.time() < self.feedback_timer:
-            feedback_surface = self.font.render(self.feedback, True, self.feedback_color)
-            feedback_rect = feedback_surface.get_rect(center=(400, 350))
-            self.screen.blit(feedback_surface, feedback_rect)
-            if self.learning_mode:
-                answer_text = f"Answer: {self.last_question_answer}"
-                answer_surface = self.font.render(answer_text, True, (255, 255, 0))
-                answer_rect = answer_surface.get_rect(center=(400, 390))
-                self.screen.blit(answer_surface, answer_rect)
-                if self.last_question_info.strip():
-                    info_text = f"Info: {self.last_question_info}"
-                    draw_wrapped_text(self.screen, info_text, (50, 430), self.font, color=(200, 200, 0), max_width=700)
-        self.draw_question_timer_bar()
-        draw_text(self.screen, f"Time Left: {self.time_left}s", (10, 10), self.font)
-        if self.game_mode == "clear":
-            remaining_text = f"Questions Remaining: {len(self.available_questions)}"
-            draw_text(self.screen, remaining_text, (10, 40), self.font)
-            correct_count_text = f"Correct Questions: {self.clear_mode_correct}"
-            draw_text(self.screen, correct_count_text, (10, 70), self.font)
-        draw_text(self.screen, f"Score: {self.score}", (10, 550), self.font)
-        if self.questions_answered > 0:
-            percentage = int((self.questions_correct / self.questions_answered) * 100)
-            correct_text = f"Correct: {percentage}%"
-        else:
-            correct_text = "Correct: 0%"
-        correct_surface = self.font.render(correct_text, True, (255, 255, 255))
-        correct_rect = correct_surface.get_rect(center=(400, 560))
-        self.screen.blit(correct_surface, correct_rect)
-
-    def update(self):
-        if self.state != "playing":
-            return
-        if self.state == "playing":
-            self.time_left = self.game_length - int(time.time() - self.start_time)
-            if self.time_left <= 0:
-                self.wrong_answers_file = self.save_wrong_answers()
-                self.state = "game_over"
-            elif time.time() > self.question_timer:
-                self.questions_answered += 1
-                self.feedback = "Pass"
-                self.feedback_color = (255, 255, 255)
-                self.correct_streak = 0
-                wrong_entry = {
-                    'question': self.current_question[0],
-                    'correct_answer': self.current_question[1],
-                    'user_answer': '(No answer - time expired)',
-                    'extra_info': self.current_question[2] if len(self.current_question) > 2 else ''
-                }
-                self.wrong_answers.append(wrong_entry)
-                self.next_question()
+    def menu_settings(self):
+        game_length = seconds_setting(self.input_box_game_length.text, 180)
+        question_time = seconds_setting(self.input_box_question_time.text, 15)
+        return game_length, question_time, self.input_box_filter.text
 
     def handle_mouse_click(self, event):
-        import pygame
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             if self.state == "menu":
                 start_btn = pygame.Rect(300, 430, 200, 50)
                 clear_btn = pygame.Rect(300, 490, 200, 50)
+                review_btn = pygame.Rect(300, 550, 200, 40)
                 if start_btn.collidepoint(event.pos):
-                    self.game_mode = "normal"
-                    self.reset_game()
+                    self.dispatch((START, ("normal", *self.menu_settings())))
                 elif clear_btn.collidepoint(event.pos):
-                    self.game_mode = "clear"
-                    self.reset_game()
+                    self.dispatch((START, ("clear", *self.menu_settings())))
+                elif review_btn.collidepoint(event.pos):
+                    self.dispatch((START, ("review", *self.menu_settings())))
             elif self.state == "game_over":
                 restart_btn = pygame.Rect(300, 350, 200, 50)
                 menu_btn = pygame.Rect(300, 420, 200, 50)
                 if restart_btn.collidepoint(event.pos):
-                    self.reset_game()
+                    self.dispatch((START, (self.game_mode, *self.menu_settings())))
                 elif menu_btn.collidepoint(event.pos):
-                    self.state = "menu"
+                    self.dispatch((MENU, None))
+
+    def apply_bank_changes(self, removed, added):
+        super().apply_bank_changes(removed, added)
+        self.filter_status_cache = ("", "")
+
+    def filter_status(self):
+        text = self.input_box_filter.text
+        if not parse_query(text):
+            return ""
+        if self.filter_status_cache[0] != text:
+            if isinstance(self._question_index, Future) and not self._question_index.done():
+                return "indexing..."
+            count = len(self.filtered_indices(text))
+            self.filter_status_cache = (text, f"{count} match" if count else "no match")
+        return self.filter_status_cache[1]
 
     def handle_input(self, event):
-        import pygame
         if self.state == "playing" and event.type == pygame.KEYDOWN:
             if event.key == pygame.K_RETURN or event.key == pygame.K_KP_ENTER:
-                self.questions_answered += 1
-                user_answer = self.user_input.strip().lower()
-                correct_answer = self.current_question[1].strip().lower()
-                if user_answer == correct_answer:
-                    self.questions_correct += 1
-                    if self.game_mode == "clear":
-                        self.clear_mode_correct += 1
-                        if self.current_question in self.available_questions:
-                            self.available_questions.remove(self.current_question)
-                    self.correct_streak += 1
-                    multiplier = 1
-                    if self.correct_streak >= 3:
-                        multiplier = self.correct_streak - 1
-                    self.score += 10 * multiplier
-                    self.feedback = f"Correct x{multiplier}"
-                    self.feedback_color = (0, 255, 0)
-                    if self.sound_enabled:
-                        self.sound_manager.play_correct()
-                else:
-                    similarity = calculate_similarity(user_answer, correct_answer)
-                    if similarity >= 0.9:
-                        self.questions_correct += 0.5
-                        if self.game_mode == "clear":
-                            self.clear_mode_correct += 1
-                            if self.current_question in self.available_questions:
-                                self.available_questions.remove(self.current_question)
-                        self.correct_streak += 1
-                        multiplier = 1
-                        if self.correct_streak >= 3:
-                            multiplier = self.correct_streak - 1
-                        half_points = int((10 * multiplier) / 2)
-                        self.score += half_points
-                        self.feedback = f"Close! - half points! x{multiplier}"
-                        self.feedback_color = (255, 225, 0)
-                        if self.sound_enabled:
-                            self.sound_manager.play_correct()
-                    else:
-                        self.feedback = "Incorrect"
-                        self.feedback_color = (255, 0, 0)
-                        self.correct_streak = 0
-                        wrong_entry = {
-                            'question': self.current_question[0],
-                            'correct_answer': self.current_question[1],
-                            'user_answer': self.user_input.strip(),
-                            'extra_info': self.current_question[2] if len(self.current_question) > 2 else ''
-                        }
-                        self.wrong_answers.append(wrong_entry)
-                        if self.sound_enabled:
-                            self.sound_manager.play_wrong()
-                self.next_question()
+                self.dispatch((SUBMIT, None))
             elif event.key == pygame.K_BACKSPACE:
-                self.user_input = self.user_input[:-1]
+                self.dispatch((BACKSPACE, None))
             else:
-                self.user_input += event.unicode
+                self.dispatch((TEXT, event.unicode))
 
-    def draw(self):
-        import pygame
-        self.screen.fill((0, 0, 0))
+    def draw_question_timer_bar(self):
+        pygame.draw.rect(self.screen, (100, 100, 100), (40, 170, 710, 10))
+        pygame.draw.rect(self.screen, (0, 200, 0), (40, 170, self.question_bar_width(), 10))
+
+    def draw_feedback(self):
+        feedback_surface = render_text(self.feedback, self.font, self.feedback_color)
+        feedback_rect = feedback_surface.get_rect(center=(400, 350))
+        self.screen.blit(feedback_surface, feedback_rect)
+        if self.learning_mode:
+            answer_text = f"Answer: {self.last_question_answer}"
+            answer_surface = render_text(answer_text, self.font, (255, 255, 0))
+            answer_rect = answer_surface.get_rect(center=(400, 390))
+            self.screen.blit(answer_surface, answer_rect)
+            if self.last_question_info.strip():
+                info_text = f"Info: {self.last_question_info}"
+                draw_wrapped_text(self.screen, info_text, (50, 430), self.font, color=(200, 200, 0), max_width=700)
+
+    def feedback_height(self):
+        if not self.learning_mode:
+            return 40
+        if not self.last_question_info.strip():
+            return 80
+        lines = wrap_text(f"Info: {self.last_question_info}", self.font, 700)
+        return 100 + wrapped_height(lines, self.font)
+
+    def draw_status(self):
+        draw_text(self.screen, f"Time Left: {self.time_left}s", (10, 10), self.font)
+        if self.game_mode == "clear":
+            remaining_text = f"Questions Remaining: {len(self.available_questions)}"
+            draw_text(self.screen, remaining_text, (10, 40), self.font)
+            correct_count_text = f"Correct Questions: {self.clear_mode_correct}"
+            draw_text(self.screen, correct_count_text, (10, 70), self.font)
+
+    def correct_text(self):
+        if self.questions_answered > 0:
+            percentage = int((self.questions_correct / self.questions_answered) * 100)
+            return f"Correct: {percentage}%"
+        return "Correct: 0%"
+
+    def draw_score(self):
+        draw_text(self.screen, f"Score: {self.score}", (10, 550), self.font)
+        correct_surface = render_text(self.correct_text(), self.font, (255, 255, 255))
+        correct_rect = correct_surface.get_rect(center=(400, 560))
+        self.screen.blit(correct_surface, correct_rect)
+
+    def draw_all_information(self):
+        r = self.renderer
+        if self.feedback and self.clock.now < self.feedback_timer:
+            key = (self.feedback, self.feedback_color, self.learning_mode, self.last_question_answer, self.last_question_info)
+            r.add("feedback", (0, 330, 800, self.feedback_height()), key, self.draw_feedback)
+        if self.state == "playing" and self.current_question:
+            r.add("timer_bar", (40, 170, 710, 10), self.question_bar_width(), self.draw_question_timer_bar)
+        key = (self.time_left, self.game_mode, len(self.available_questions), self.clear_mode_correct)
+        r.add("status", (0, 0, 400, 100), key, self.draw_status)
+        r.add("score", (0, 540, 800, 60), (self.score, self.correct_text()), self.draw_score)
+
+    def draw_chrome(self):
         sound_text = f"F11 > Sound: {'On' if self.sound_enabled else 'Off'}"
         lm_text = f"F12 > Learning Mode: {'On' if self.learning_mode else 'Off'}"
-        sound_surface = self.font.render(sound_text, True, (255, 255, 255))
-        lm_surface = self.font.render(lm_text, True, (255, 255, 255))
+        sound_surface = render_text(sound_text, self.font, (255, 255, 255))
+        lm_surface = render_text(lm_text, self.font, (255, 255, 255))
         sound_rect = sound_surface.get_rect(topright=(790, 10))
         lm_rect = lm_surface.get_rect(topright=(790, 40))
         self.screen.blit(sound_surface, sound_rect)
         self.screen.blit(lm_surface, lm_rect)
         pause_text = "F9 > Pause/Resume"
-        pause_surface = self.font.render(pause_text, True, (255, 255, 255))
+        pause_surface = render_text(pause_text, self.font, (255, 255, 255))
         pause_rect = pause_surface.get_rect(topright=(790, 70))
         self.screen.blit(pause_surface, pause_rect)
+
+    def draw_menu(self):
+        draw_text(self.screen, "A+ Typing Game", (300, 100), self.font)
+        draw_text(self.screen, "Topic Filter:", (300, 170), self.font)
+        draw_text(self.screen, "Game Length (s):", (300, 270), self.font)
+        draw_text(self.screen, "Question Time (s):", (300, 340), self.font)
+        button((300, 430, 200, 50), "Start Game", self.screen, self.font)
+        button((300, 490, 200, 50), "Clear Mode", self.screen, self.font)
+        button((300, 550, 200, 40), "Review Mode", self.screen, self.font)
+
+    def menu_notice(self):
+        # Only while the filter still reads as it did when the start failed.
+        if self.start_error and self.input_box_filter.text == self.question_filter:
+            return self.start_error
+        return ""
+
+    def draw_menu_notice(self):
+        draw_text(self.screen, self.menu_notice(), (300, 140), self.small_font, (255, 80, 80))
+
+    def draw_filter_status(self):
+        draw_text(self.screen, self.filter_status(), (510, 208), self.font, (200, 200, 0))
+
+    def draw_question(self):
+        draw_wrapped_text(self.screen, self.current_question.question, (40, 200), self.font)
+
+    def input_rect(self):
+        return render_text(f"> {self.user_input}", self.font).get_rect(topleft=(40, 300))
+
+    def draw_input(self):
+        draw_text(self.screen, f"> {self.user_input}", (40, 300), self.font)
+
+    def draw_pause_overlay(self):
+        overlay = pygame.Surface((800, 600), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 150))
+        self.screen.blit(overlay, (0, 0))
+        pause_msg = render_text("PAUSED – press F9 to resume", self.font, (255, 255, 0))
+        rect = pause_msg.get_rect(center=(400, 300))
+        self.screen.blit(pause_msg, rect)
+
+    def draw_game_over(self):
+        draw_text(self.screen, "Game Over", (335, 200), self.font)
+        draw_text(self.screen, f"Final Score: {self.score}", (315, 250), self.font)
+        if self.game_mode == "clear":
+            clear_stats_text = f"Questions Completed: {self.clear_mode_correct}"
+            draw_text(self.screen, clear_stats_text, (280, 280), self.font)
+        typing = self.typing_line()
+        if typing:
+            typing_surface = render_text(typing, self.small_font, (180, 220, 255))
+            self.screen.blit(typing_surface, typing_surface.get_rect(midtop=(400, 318)))
+        if hasattr(self, 'wrong_answers_file') and self.wrong_answers_file:
+            msg = f"Questions missed written to: {os.path.basename(self.wrong_answers_file)}"
+            draw_wrapped_text(self.screen, msg, (200, 130), self.font, color=(255, 255, 0), max_width=700)
+        button((300, 350, 200, 50), "Restart", self.screen, self.font)
+        button((300, 420, 200, 50), "Main Menu", self.screen, self.font)
+
+    def typing_line(self):
+        typing = self.typing_stats()
+        return f"Typing: {typing.summary()}" if typing is not None else ""
+
+    def session_stats_lines(self):
+        stats = self.session_stats
+        if not stats or not stats["answers"]:
+            return ()
+        lines = [f"This game: {stats['accuracy']:.0%} credit over {stats['answers']} answers"]
+        latency = stats["latency"]
+        if latency:
+            lines[0] += f", answer time {latency[50]:.1f}s median, {latency[90]:.1f}s p90"
+        lines.append(f"All games on this bank: {stats['bank_accuracy']:.0%} credit over {stats['bank_answers']} answers")
+        for question, answer, n, credit in stats["hardest"]:
+            lines.append(f"Hardest: {credit:.0%} of {n}  {question[:60]}{'...' if len(question) > 60 else ''}")
+        return lines
+
+    def draw_session_stats(self):
+        for i, line in enumerate(self.session_stats_lines()):
+            draw_text(self.screen, line, (40, 490 + i * 24), self.small_font, (180, 220, 255))
+
+    def draw(self):
+        # Declare this frame's layers; self.renderer.present() repaints only what changed.
+        r = self.renderer
+        r.add("chrome", (400, 0, 400, 100), (self.sound_enabled, self.learning_mode), self.draw_chrome)
         if self.state == "menu":
-            draw_text(self.screen, "A+ Typing Game", (300, 100), self.font)
-            draw_text(self.screen, "Game Length (s):", (300, 270), self.font)
-            self.input_box_game_length.draw(self.screen)
-            draw_text(self.screen, "Question Time (s):", (300, 340), self.font)
-            self.input_box_question_time.draw(self.screen)
-            button((300, 430, 200, 50), "Start Game", self.screen, self.font)
-            button((300, 490, 200, 50), "Clear Mode", self.screen, self.font)
+            r.add("menu", (300, 100, 260, 490), None, self.draw_menu)
+            for name, box in zip(("game_length", "question_time", "filter"), self.menu_boxes()):
+                r.add(name, box.rect, (box.text, box.active, box.color), lambda box=box: box.draw(self.screen))
+            r.add("filter_status", (505, 200, 160, 40), self.filter_status(), self.draw_filter_status)
+            r.add("menu_notice", (300, 136, 500, 28), self.menu_notice(), self.draw_menu_notice)
         elif self.state == "playing":
-            draw_wrapped_text(self.screen, f"{self.current_question[0]}", (40, 200), self.font)
-            draw_text(self.screen, f"> {self.user_input}", (40, 300), self.font)
+            lines = wrap_text(self.current_question.question, self.font, 700)
+            r.add("question", (40, 200, 720, wrapped_height(lines, self.font)), self.current_question.question, self.draw_question)
+            r.add("input", self.input_rect(), self.user_input, self.draw_input)
             self.draw_all_information()
         elif self.state == "paused":
-            draw_text(self.screen, f"> {self.user_input}", (40, 300), self.font)
+            r.add("input", self.input_rect(), self.user_input, self.draw_input)
             self.draw_all_information()
-            overlay = pygame.Surface((800, 600), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 150))
-            self.screen.blit(overlay, (0, 0))
-            pause_msg = self.font.render("PAUSED – press F9 to resume", True, (255, 255, 0))
-            rect = pause_msg.get_rect(center=(400, 300))
-            self.screen.blit(pause_msg, rect)
+            r.add("pause_overlay", (0, 0, 800, 600), None, self.draw_pause_overlay)
         elif self.state == "game_over":
-            draw_text(self.screen, "Game Over", (335, 200), self.font)
-            draw_text(self.screen, f"Final Score: {self.score}", (315, 250), self.font)
-            if self.game_mode == "clear":
-                clear_stats_text = f"Questions Completed: {self.clear_mode_correct}"
-                draw_text(self.screen, clear_stats_text, (280, 280), self.font)
-            if hasattr(self, 'wrong_answers_file') and self.wrong_answers_file:
-                import os
-                msg = f"Questions missed written to: {os.path.basename(self.wrong_answers_file)}"
-                draw_wrapped_text(self.screen, msg, (200, 130), self.font, color=(255, 255, 0), max_width=700)
-            button((300, 350, 200, 50), "Restart", self.screen, self.font)
-            button((300, 420, 200, 50), "Main Menu", self.screen, self.font)
-
+            key = (self.score, self.game_mode, self.clear_mode_correct, self.wrong_answers_file, self.typing_line())
+            r.add("game_over", (0, 100, 800, 380), key, self.draw_game_over)
+            if self.session_stats:
+                r.add("session_stats", (0, 480, 800, 120), self.session_stats_lines(), self.draw_session_stats)
@@ -0,0 +1,191 @@
+import json
+import os
+import queue
+import threading
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+def write_report(filepath, entries):
+    """Write the human-readable wrong answers report"""
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write('Wrong Answers Report\n')
+        f.write('=' * 50 + '\n\n')
+        for i, entry in enumerate(entries, 1):
+            f.write(f'Question {i}:\n')
+            f.write(f'Q: {entry["question"]}\n')
+            f.write(f'Correct Answer: {entry["correct_answer"]}\n')
+            f.write(f'Your Answer: {entry["user_answer"]}\n')
+            if entry['extra_info']:
+                f.write(f'Extra Info: {entry["extra_info"]}\n')
+            if entry.get('typing'):
+                f.write(f'Typing: {entry["typing"]}\n')
+            f.write('\n' + '-' * 30 + '\n\n')
+        f.write(f'Total Wrong Answers: {len(entries)}\n')
+
+
+def report_entry(question, user_answer, typing=None):
+    return {
+        'question': question.question,
+        'correct_answer': question.answer,
+        'user_answer': user_answer,
+        'extra_info': question.extra_info,
+        'typing': typing.summary() if typing is not None else None,
+    }
+
+
+def report_path(reports_folder, when=None, microseconds=False):
+    when = when or datetime.now()
+    stamp = when.strftime("%H%M%S%f" if microseconds else "%H%M%S")
+    return Path(reports_folder) / f'WrongAnswers{when.strftime("%Y%m%d")}{stamp}.txt'
+
+
+def lock_journal(f):
+    """Lock an open journal from the start without waiting; False if another game holds it"""
+    f.seek(0)
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def read_journal(f):
+    entries = []
+    for line in f:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            break  # torn last line from a crash
+    return entries
+
+
+# Crash-safe record of a session's misses. Each miss is appended as one JSON line
+# by a background thread, so the game thread never touches the disk; the report
+# is produced from the journal at game over, or on the next launch if the game died.
+# A session's journal stays locked while it is open, so a second running game
+# never mistakes it for one left behind.
+class WrongAnswerJournal:
+    def __init__(self, journal_folder, reports_folder, max_pending=256):
+        self.journal_folder = Path(journal_folder)
+        self.reports_folder = Path(reports_folder)
+        # Bounded: if the disk stalls for max_pending misses, record() waits rather than dropping one.
+        self.queue = queue.Queue(max_pending)
+        self.file = None
+        self.path = None
+        self.misses = 0
+        self.thread = threading.Thread(target=self.run, name="wrong-answer-journal", daemon=True)
+        self.thread.start()
+
+    def begin_session(self):
+        self.misses = 0
+        self.queue.put(("begin", datetime.now().strftime('%Y%m%d%H%M%S%f')))
+
+    def record(self, question, user_answer, typing=None):
+        self.misses += 1
+        self.queue.put(("record", (question, user_answer, typing)))
+
+    def finish(self, on_written=None):
+        """Queue the report for this session; on_written(path) is called from the writer thread once it is on disk"""
+        if not self.misses:
+            self.queue.put(("discard", None))
+            return
+        self.queue.put(("report", (report_path(self.reports_folder), on_written)))
+
+    def recover(self):
+        """Queue reports for journals left behind by sessions that never reached game over"""
+        self.queue.put(("recover", None))
+
+    def close(self):
+        self.queue.put(("close", None))
+        self.thread.join()
+
+    def run(self):
+        while True:
+            op, value = self.queue.get()
+            try:
+                if op == "begin":
+                    self.close_journal()
+                    self.journal_folder.mkdir(parents=True, exist_ok=True)
+                    self.path = self.journal_folder / f'journal-{value}.jsonl'
+                    self.file = open(self.path, 'a', encoding='utf-8')
+                    lock_journal(self.file)
+                elif op == "record":
+                    self.file.write(json.dumps(report_entry(*value), ensure_ascii=False) + '\n')
+                    self.file.flush()
+                elif op == "report":
+                    filepath, on_written = value
+                    self.close_journal()
+                    with open(self.path, encoding='utf-8') as f:
+                        entries = read_journal(f)
+                    self.write_journal_report(self.path, filepath, entries)
+                    self.path = None
+                    if entries and on_written is not None:
+                        on_written(str(filepath))
+                elif op == "discard":
+                    self.close_journal()
+                    if self.path is not None:
+                        os.remove(self.path)
+                    self.path = None
+                elif op == "recover":
+                    self.recover_journals()
+                elif op == "close":
+                    self.close_journal()
+                    return
+            except Exception as e:
+                print(f'Error writing wrong answers journal: {e}')
+
+    def close_journal(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def write_journal_report(self, journal_path, filepath, entries):
+        if entries:
+            self.reports_folder.mkdir(parents=True, exist_ok=True)
+            tmp_path = Path(f'{filepath}.tmp')
+            write_report(tmp_path, entries)
+            os.replace(tmp_path, filepath)
+        os.remove(journal_path)
+
+    def recover_journals(self):
+        if not self.journal_folder.is_dir():
+            return
+        for journal_path in sorted(self.journal_folder.glob('journal-*.jsonl')):
+            if journal_path == self.path:
+                continue
+            # 'a+' so a journal another game is writing is never truncated; the lock then tells it apart.
+            with open(journal_path, 'a+', encoding='utf-8') as f:
+                if not lock_journal(f):
+                    continue
+                entries = read_journal(f)
+            # Microseconds, as in the journal name: two sessions can start in the same second.
+            started = datetime.strptime(journal_path.stem[len('journal-'):], '%Y%m%d%H%M%S%f')
+            self.write_journal_report(journal_path, report_path(self.reports_folder, started, microseconds=True), entries)
+
+
+# Journal that keeps nothing, for headless runs (replays) that must not write reports.
+class NullJournal:
+    def begin_session(self):
+        pass
+
+    def record(self, question, user_answer, typing=None):
+        pass
+
+    def finish(self, on_written=None):
+        pass
+
+    def recover(self):
+        pass
+
+    def close(self):
+        pass
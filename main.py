@@ -1,26 +1,53 @@
-import pygame
-import random
 import time
+BOOT_START = time.perf_counter()
+
+import argparse
 import os
-from datetime import datetime
-from ui_helpers import draw_text, draw_wrapped_text, button, TextInputBox
-from data_loader import load_questions
-from utils import calculate_similarity, get_documents_folder
-from sound_manager import SoundManager
-from game_logic import TypingGame
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor, wait
+from importlib.util import find_spec
 
-# Initialize Pygame and the mixer for sound.
-pygame.init()
-pygame.mixer.init()
-screen = pygame.display.set_mode((800, 600))
-pygame.display.set_caption("A+ Typing Game")
-font = pygame.font.Font(None, 36)
-clock = pygame.time.Clock()
 
-# sound_manager instance
-sound_manager = SoundManager()
+def import_pygame():
+    # pygame.pkgdata falls back to plain file access when pkg_resources can't be
+    # imported, and importing it costs more than the rest of startup combined.
+    # Only an install unpacked on disk can do without it, so only then is it
+    # hidden while pygame loads, and pygame is imported again normally if that fails.
+    spec = find_spec("pygame")
+    hide = ("pkg_resources" not in sys.modules and spec is not None
+            and spec.origin is not None and os.path.isfile(spec.origin))
+    if hide:
+        sys.modules["pkg_resources"] = None
+        try:
+            import pygame
+            return pygame
+        except ImportError:
+            for name in [name for name in sys.modules if name == "pygame" or name.startswith("pygame.")]:
+                del sys.modules[name]
+        finally:
+            del sys.modules["pkg_resources"]
+    import pygame
+    return pygame
 
-game = TypingGame(sound_manager, font, screen)
+
+pygame = import_pygame()
+from ui_helpers import render_text, WarmUp
+from data_loader import load_bank
+from bank_watcher import BankWatcher
+from question_index import load_bank_index
+from utils import get_documents_folder, get_data_folder
+from sound_manager import SoundManager
+from game_logic import TypingGame, WARM_UP_TEXT
+from scheduler import FrameScheduler
+from journal import WrongAnswerJournal
+from spaced_repetition import ReviewStore
+from startup import StartupProfile, import_times
+from datetime import datetime
+from frame_profiler import FrameProfiler, WAIT, EVENTS, INPUT, UPDATE, DRAW, PRESENT
+from game_core import PAUSE
+from recording import SessionRecorder
+from analytics import AnalyticsStore
 
 # Default game settings
 default_game_length = 180  # seconds
@@ -33,55 +60,229 @@ PLAYING = "playing"
 PAUSED = "paused"
 GAME_OVER = "game_over"
 
+BANK_CHANGED = pygame.USEREVENT + 2
+
 # Game Modes
 NORMAL_MODE = "normal"
 CLEAR_MODE = "clear"
 
-# Main loop
-running = True
-while running:
-    screen.fill((0, 0, 0))
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        if event.type == pygame.KEYDOWN and event.key == pygame.K_F9:
-            if game.state == "playing":
-                game.pause()
-            elif game.state == "paused":
-                game.resume()
-        if event.type == pygame.KEYDOWN and event.key == pygame.K_F11:
-            game.sound_enabled = not game.sound_enabled
-        if event.type == pygame.KEYDOWN and event.key == pygame.K_F12:
-            game.learning_mode = not game.learning_mode
-        game.handle_mouse_click(event)
-        if game.state == "menu":
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_TAB:
-                if game.input_box_game_length.active:
-                    game.input_box_game_length.active = False
-                    game.input_box_game_length.color = game.input_box_game_length.color_inactive
-                    game.input_box_question_time.active = True
-                    game.input_box_question_time.text = ""
-                    game.input_box_question_time.txt_surface = font.render(game.input_box_question_time.text, True,(0, 0, 0))
-                    game.input_box_question_time.color = game.input_box_question_time.color_active
-                elif game.input_box_question_time.active:
-                    game.input_box_question_time.active = False
-                    game.input_box_question_time.color = game.input_box_question_time.color_inactive
-                    game.input_box_game_length.active = True
-                    game.input_box_game_length.text = ""
-                    game.input_box_game_length.txt_surface = font.render(game.input_box_game_length.text, True,(0, 0, 0))
-                    game.input_box_game_length.color = game.input_box_game_length.color_active
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="A+ Typing Game")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print per-phase startup timings and import times once the menu is up, then exit")
+    parser.add_argument("--record", metavar="PATH", help="record the session's input stream for recording.py to replay")
+    parser.add_argument("--seed", type=int, help="seed for question order (recorded sessions always have one)")
+    parser.add_argument("--bank", metavar="CSV", action="append",
+                        help="question file; repeat to merge several files into one bank. Near-duplicate questions are dropped (default: questions.csv)")
+    parser.add_argument("--watch", action="store_true", help="pick up edits to the bank files while the game runs")
+    args = parser.parse_args(argv)
+    if args.bank is None:
+        args.bank = ["questions.csv"]
+    if args.watch and args.record:
+        # Recordings don't capture bank edits, so a replay could not reproduce the session.
+        parser.error("--watch can't be combined with --record")
+    return args
+
+
+def profiled(profile, name, fn, *args):
+    with profile.phase(name):
+        return fn(*args)
+
+
+def boot(profile, seed=None, banks=("questions.csv",)):
+    # Window and font first; everything else loads in workers while the menu is on screen.
+    with profile.phase("display"):
+        pygame.display.init()
+        pygame.font.init()
+        screen = pygame.display.set_mode((800, 600))
+        pygame.display.set_caption("A+ Typing Game")
+        font = pygame.font.Font(None, 36)
+
+    workers = ThreadPoolExecutor(max_workers=4, thread_name_prefix="boot")
+    questions = workers.submit(profiled, profile, "questions", load_bank, banks)
+    index = workers.submit(profiled, profile, "index", load_bank_index, banks)
+    sounds = workers.submit(profiled, profile, "sounds", SoundManager)
+    workers.shutdown(wait=False)
+
+    with profile.phase("game"):
+        # Misses are journaled off the game thread; reports from crashed sessions are recovered at startup.
+        journal = WrongAnswerJournal(get_data_folder() / 'journal', get_documents_folder())
+        journal.recover()
+        # Review Mode state loads on its own thread; only starting Review Mode waits for it.
+        review_store = ReviewStore(get_data_folder() / 'review_state.jsonl')
+        game = TypingGame(None, font, screen, default_game_length, default_question_time, seed=seed,
+                          questions=questions, journal=journal, review_store=review_store, question_index=index)
+    # Plain attribute swap once the mixer is ready; until then feedback is silent.
+    def use_sounds(done):
+        if done.exception() is not None:
+            print(f'Error loading sounds: {done.exception()}')
+            return
+        game.sound_manager = done.result()
+    sounds.add_done_callback(use_sounds)
+
+    with profile.phase("first_frame"):
+        game.draw()
+        game.renderer.present()
+    # Text the first game frames need is rendered between menu frames, on this thread.
+    warm = WarmUp(font, WARM_UP_TEXT)
+    return game, journal, font, warm, [questions, index, sounds]
+
+
+# Frame profiler overlay (F8), refreshed twice a second so it doesn't dirty every frame.
+class ProfilerOverlay:
+    def __init__(self, profiler, screen):
+        self.profiler = profiler
+        self.screen = screen
+        self.font = pygame.font.Font(None, 22)
+        self.visible = False
+        self.lines = ()
+        self.refreshed = 0.0
+
+    def add_layer(self, renderer):
+        if not self.visible:
+            return
+        now = time.perf_counter()
+        if now - self.refreshed >= 0.5:
+            self.lines = self.profiler.overlay_lines()
+            self.refreshed = now
+        renderer.add("profiler", (540, 100, 260, 60), self.lines, self.draw)
+
+    def draw(self):
+        pygame.draw.rect(self.screen, (40, 40, 40), (540, 100, 260, 60))
+        for i, line in enumerate(self.lines):
+            self.screen.blit(render_text(line, self.font, (0, 255, 255)), (546, 104 + i * 18))
+
+
+def export_trace(profiler):
+    stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+    folder = get_documents_folder()
+    try:
+        folder.mkdir(exist_ok=True)
+        profiler.export_csv(folder / f'FrameTrace{stamp}.csv')
+        profiler.export_chrome_trace(folder / f'FrameTrace{stamp}.json')
+    except OSError as e:
+        print(f'Error exporting frame trace: {e}')
+        return
+    print(f'Frame trace written to {folder / f"FrameTrace{stamp}"}.csv/.json')
+
+
+def toggle_cprofile(profiler):
+    path = get_documents_folder() / f'FrameProfile{datetime.now().strftime("%Y%m%d%H%M%S")}.prof'
+    try:
+        summary = profiler.toggle_cprofile(path)
+    except OSError as e:
+        print(f'Error saving cProfile capture: {e}')
+        return
+    if summary is not None:
+        print(f'cProfile capture written to {path}')
+        print(summary)
+
+
+def report_startup(profile, warm, pending):
+    with profile.phase("font_warm_up"):
+        warm.step(None)
+    wait(pending)
+    modules = ["pygame", "game_logic", "sound_manager", "data_loader", "scheduler", "journal"]
+    print(profile.report(import_times(modules)))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    profile = StartupProfile(BOOT_START)
+    profile.mark("imports_done")
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 63)
+    game, journal, font, warm, pending = boot(profile, seed, args.bank)
+    if args.profile_startup:
+        report_startup(profile, warm, pending)
+        journal.close()
+        game.review_store.close()
+        pygame.quit()
+        return
+    scheduler = FrameScheduler()
+    profiler = FrameProfiler(budget=scheduler.min_interval)
+    overlay = ProfilerOverlay(profiler, game.screen)
+    if args.record:
+        game.recorder = SessionRecorder(args.record, seed, os.pathsep.join(args.bank), game.clock.epoch)
+    game.analytics = AnalyticsStore(get_data_folder() / 'analytics.sqlite3', ", ".join(args.bank))
+    watcher = None
+    if args.watch:
+        # Posting an event wakes the scheduler if it is idling on the menu.
+        watcher = BankWatcher(args.bank, notify=lambda: pygame.event.post(pygame.event.Event(BANK_CHANGED)))
+
+    # Main loop
+    running = True
+    while running:
+        events = scheduler.wait(0 if warm is not None else game.next_frame_delay())
+        profiler.mark(WAIT)
+        game.clock.sample()
+        if watcher is not None:
+            for removed, added in watcher.poll():
+                try:
+                    game.apply_bank_changes(removed, added)
+                except ValueError as e:
+                    print(f'Stopped reloading questions: {e}')
+                    watcher.stop()
+                    watcher = None
+                    break
+        for event in events:
+            if event.type == pygame.QUIT:
+                running = False
+            if event.type == pygame.WINDOWEXPOSED:
+                game.renderer.invalidate()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F9:
+                game.dispatch((PAUSE, None))
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F11:
+                game.sound_enabled = not game.sound_enabled
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F12:
+                game.learning_mode = not game.learning_mode
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F8:
+                overlay.visible = not overlay.visible
+                overlay.refreshed = 0.0
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F7:
+                export_trace(profiler)
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F6:
+                toggle_cprofile(profiler)
+                overlay.refreshed = 0.0
+            profiler.mark(EVENTS)
+            game.handle_mouse_click(event)
+            if game.state == "menu":
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_TAB:
+                    boxes = game.menu_boxes()
+                    active = next((i for i, box in enumerate(boxes) if box.active), -1)
+                    for box in boxes:
+                        box.active = False
+                        box.color = box.color_inactive
+                    box = boxes[(active + 1) % len(boxes)]
+                    box.active = True
+                    box.text = ""
+                    box.txt_surface = render_text(box.text, font, (0, 0, 0))
+                    box.color = box.color_active
                 else:
-                    game.input_box_game_length.active = True
-                    game.input_box_game_length.text = ""
-                    game.input_box_game_length.txt_surface = font.render(game.input_box_game_length.text, True,(0, 0, 0))
-                    game.input_box_game_length.color = game.input_box_game_length.color_active
-                continue
-            game.input_box_game_length.handle_event(event)
-            game.input_box_question_time.handle_event(event)
-        if game.state == "playing":
-            game.handle_input(event)
-    game.update()
-    game.draw()
-    pygame.display.flip()
-    clock.tick(60)
-pygame.quit()
+                    for box in game.menu_boxes():
+                        box.handle_event(event)
+            if game.state == "playing":
+                game.handle_input(event)
+            profiler.mark(INPUT)
+        game.update()
+        profiler.mark(UPDATE)
+        game.draw()
+        overlay.add_layer(game.renderer)
+        if warm is not None and not warm.step():
+            warm = None
+        profiler.mark(DRAW)
+        game.renderer.present()
+        profiler.mark(PRESENT)
+        profiler.end_frame()
+    if watcher is not None:
+        watcher.stop()
+    if game.recorder is not None:
+        game.recorder.close(game)
+    journal.close()
+    game.analytics.close()
+    game.review_store.close()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,116 @@
+import re
+from functools import lru_cache
+
+# Similarity a typed answer needs for half points.
+SIMILARITY_THRESHOLD = 0.9
+
+# Multi-part answers ("Ian Murdock/1993", "Shift/Esc") may be typed with any of these between parts.
+PART_SEPARATORS = re.compile(r"\s*[/,;&+]\s*")
+QUOTED = re.compile(r"'([^']+)'")
+# Extra info that opens with "or" and a quoted answer, e.g. "or 'control userpasswords2'/'control userpasswords'".
+# Quotes further into the note ("or use --help after; '--help | more' ...") are prose, not answers.
+LEADING_ALTERNATES = re.compile(r"or\s+(?:an?\s+|the\s+)?('[^']+'(?:\s*(?:/|,|or)\s*'[^']+')*)", re.IGNORECASE)
+
+
+def normalize(text):
+    """Lowercase and collapse whitespace"""
+    return " ".join(text.lower().split())
+
+
+def loosen(text):
+    """Normalized text with each multi-part separator folded to a single "/" """
+    return PART_SEPARATORS.sub("/", text)
+
+
+def extra_alternates(extra_info):
+    """Alternates the bank lists in the extra info column, e.g. "or 'control userpasswords2'" """
+    match = LEADING_ALTERNATES.match(extra_info.strip())
+    return QUOTED.findall(match.group(1)) if match else []
+
+
+def bounded_distance(a, b, limit):
+    """Insert/delete edit distance between a and b, or limit + 1 as soon as it must exceed limit.
+
+    A substitution counts as a delete plus an insert, which keeps similarity()
+    on the same scale as the difflib ratio the 0.9 threshold was tuned for.
+    """
+    if a == b:
+        return 0
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > limit:
+        return limit + 1
+    # Common prefix and suffix never cost anything.
+    start = 0
+    while start < len(a) and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a, b = a[start:end_a], b[start:end_b]
+    if not a:
+        return len(b) if len(b) <= limit else limit + 1
+    over = limit + 1
+    len_b = len(b)
+    previous = [j if j <= limit else over for j in range(len_b + 1)]
+    for i, ca in enumerate(a, 1):
+        # Only cells within limit of the diagonal can stay under limit.
+        lo = max(1, i - limit)
+        hi = min(len_b, i + limit)
+        current = [over] * (len_b + 1)
+        current[0] = i if i <= limit else over
+        row_min = current[0]
+        for j in range(lo, hi + 1):
+            value = previous[j - 1] if ca == b[j - 1] else previous[j - 1] + 2
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > limit:
+            return over
+        previous = current
+    return min(previous[len_b], over)
+
+
+def similarity(a, b, threshold=0.0):
+    """Edit-distance similarity in [0, 1]; returns 0.0 early when it can't reach threshold"""
+    total = len(a) + len(b)
+    if not total:
+        return 1.0
+    limit = int(total * (1 - threshold) + 1e-9)
+    distance = bounded_distance(a, b, limit)
+    if distance > limit:
+        return 0.0
+    return 1 - distance / total
+
+
+# Every accepted spelling of one question's answer, normalized once.
+class AnswerKey:
+    __slots__ = ("answers",)
+
+    def __init__(self, answer, extra_info=""):
+        accepted = [normalize(answer)]
+        accepted.extend(normalize(alt) for alt in extra_alternates(extra_info))
+        accepted.extend([loosen(a) for a in accepted])
+        self.answers = tuple(dict.fromkeys(a for a in accepted if a))
+
+    def similarity(self, user_answer, threshold=SIMILARITY_THRESHOLD):
+        """1.0 for an accepted answer, else the best similarity at or above threshold, else 0.0"""
+        typed = normalize(user_answer)
+        if typed in self.answers or loosen(typed) in self.answers:
+            return 1.0
+        best = 0.0
+        for answer in self.answers:
+            score = similarity(typed, answer, max(threshold, best))
+            if score > best:
+                best = score
+        return best
+
+
+@lru_cache(maxsize=4096)
+def answer_key(answer, extra_info=""):
+    return AnswerKey(answer, extra_info)
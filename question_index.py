@@ -0,0 +1,208 @@
+import os
+import re
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from data_loader import ColumnBank, file_sha1, parse_questions
+
+# Token index, stored next to each CSV as <name>.csv.qbi:
+#   header: magic, version, indexed row count, token count, source sha1
+#   token offsets: tokens + 1 little-endian uint32 byte offsets into the token table
+#   posting offsets: tokens + 1 little-endian uint32 offsets into the postings
+#   token table: sorted tokens, UTF-8, back to back
+#   postings: ascending row numbers for each token, little-endian uint32
+INDEX_SUFFIX = ".qbi"
+INDEX_MAGIC = b"QIDX"
+INDEX_VERSION = 1
+HEADER = struct.Struct("<4sHHII20s")
+TOKEN = re.compile(r"\w+")
+# Quoted words must match whole tokens; bare words match token prefixes.
+QUERY = re.compile(r'"([^"]*)"?|([^"]+)')
+# Sorts after every token that starts with a given prefix.
+PREFIX_END = chr(0x10FFFF)
+
+
+def tokenize(text):
+    return TOKEN.findall(text.lower())
+
+
+def question_tokens(question):
+    return set(tokenize(f"{question.question} {question.answer} {question.extra_info}"))
+
+
+def parse_query(text):
+    """Query text as (term, exact) pairs: "acpi" matches the word acpi, deb matches debian too"""
+    terms = []
+    for quoted, bare in QUERY.findall(text):
+        if quoted:
+            terms.extend((token, True) for token in tokenize(quoted))
+        else:
+            terms.extend((token, False) for token in tokenize(bare))
+    return terms
+
+
+def matches(question, terms):
+    """The index's matching rule applied to a single question, for rows added after indexing"""
+    tokens = question_tokens(question)
+    for term, exact in terms:
+        if exact:
+            if term not in tokens:
+                return False
+        elif not any(token.startswith(term) for token in tokens):
+            return False
+    return True
+
+
+# Inverted index from question, answer and extra-info tokens to row numbers.
+# Tokens are kept sorted, so a prefix is a bisect away from its token range.
+class QuestionIndex:
+    def __init__(self, tokens, offsets, postings, count):
+        self.tokens = tokens
+        self.offsets = offsets
+        self.postings = postings
+        # Rows 0..count-1 are indexed; rows appended later are not.
+        self.count = count
+
+    @classmethod
+    def build(cls, questions):
+        rows = {}
+        count = 0
+        for row, question in enumerate(questions):
+            count = row + 1
+            if question is None:
+                continue
+            for token in question_tokens(question):
+                rows.setdefault(token, []).append(row)
+        return cls.from_rows(rows, count)
+
+    @classmethod
+    def merge(cls, indexes):
+        """One index over banks laid end to end, as load_bank merges them"""
+        rows = {}
+        start = 0
+        for index in indexes:
+            for i, token in enumerate(index.tokens):
+                rows.setdefault(token, []).extend(row + start for row in index.posting(i))
+            start += index.count
+        return cls.from_rows(rows, start)
+
+    @classmethod
+    def from_rows(cls, rows, count):
+        tokens = sorted(rows)
+        offsets = array('I', [0])
+        postings = array('I')
+        for token in tokens:
+            postings.extend(rows[token])
+            offsets.append(len(postings))
+        return cls(tokens, offsets, postings, count)
+
+    def posting(self, i):
+        return self.postings[self.offsets[i]:self.offsets[i + 1]]
+
+    def prefix(self, term):
+        """Rows with a token starting with term"""
+        lo = bisect_left(self.tokens, term)
+        hi = bisect_left(self.tokens, term + PREFIX_END, lo)
+        if hi - lo == 1:
+            return set(self.posting(lo))
+        return set(self.postings[self.offsets[lo]:self.offsets[hi]])
+
+    def keyword(self, term):
+        """Rows containing exactly the token term"""
+        i = bisect_left(self.tokens, term)
+        if i < len(self.tokens) and self.tokens[i] == term:
+            return set(self.posting(i))
+        return set()
+
+    def search(self, terms):
+        """Sorted rows matching every (term, exact) pair from parse_query"""
+        result = None
+        for term, exact in terms:
+            rows = self.keyword(term) if exact else self.prefix(term)
+            result = rows if result is None else result & rows
+            if not result:
+                return []
+        return sorted(result) if result is not None else list(range(self.count))
+
+    def save(self, path, sha1):
+        table = bytearray()
+        token_offsets = array('I', [0])
+        for token in self.tokens:
+            table += token.encode('utf-8')
+            token_offsets.append(len(table))
+        offsets = array('I', self.offsets)
+        postings = array('I', self.postings)
+        if sys.byteorder != 'little':
+            for a in (token_offsets, offsets, postings):
+                a.byteswap()
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION, 0, self.count, len(self.tokens), sha1))
+                f.write(token_offsets.tobytes())
+                f.write(offsets.tobytes())
+                f.write(table)
+                f.write(postings.tobytes())
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @classmethod
+    def load(cls, path, sha1):
+        """Read a saved index, or return None if it is missing, corrupt or for another version of the CSV"""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            magic, version, _, count, n, saved_sha1 = HEADER.unpack_from(data)
+            if magic != INDEX_MAGIC or version != INDEX_VERSION or saved_sha1 != sha1:
+                return None
+            start = HEADER.size
+            token_offsets = array('I', data[start:start + 4 * (n + 1)])
+            start += 4 * (n + 1)
+            offsets = array('I', data[start:start + 4 * (n + 1)])
+            start += 4 * (n + 1)
+            if sys.byteorder != 'little':
+                token_offsets.byteswap()
+                offsets.byteswap()
+            table = data[start:start + token_offsets[-1]]
+            tokens = [table[token_offsets[i]:token_offsets[i + 1]].decode('utf-8') for i in range(n)]
+            start += token_offsets[-1]
+            postings = array('I', data[start:start + 4 * offsets[-1]])
+            if sys.byteorder != 'little':
+                postings.byteswap()
+        except (OSError, struct.error, ValueError, IndexError):
+            return None
+        if len(postings) != offsets[-1]:
+            return None
+        return cls(tokens, offsets, postings, count)
+
+
+def load_index(filename, bank=None):
+    """Load the index saved next to a CSV, rebuilding and saving it if the CSV changed"""
+    sha1 = file_sha1(filename)
+    path = filename + INDEX_SUFFIX
+    index = QuestionIndex.load(path, sha1)
+    if index is None:
+        if bank is None:
+            # Parsed rows, not the compiled bank: mapping the cache here would stop the
+            # bank loader on another thread from replacing it on Windows.
+            bank = ColumnBank(parse_questions(filename))
+        index = QuestionIndex.build(bank)
+        try:
+            index.save(path, sha1)
+        except OSError:
+            pass  # read-only install: keep the in-memory index
+    return index
+
+
+def load_bank_index(filenames):
+    """Index for load_bank(filenames): one saved index per file, merged in file order"""
+    if isinstance(filenames, str):
+        filenames = [filenames]
+    indexes = [load_index(filename) for filename in filenames]
+    if len(indexes) == 1:
+        return indexes[0]
+    return QuestionIndex.merge(indexes)
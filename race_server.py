@@ -0,0 +1,227 @@
+"""Classroom race server: every client gets the same questions and is graded centrally.
+
+Run from the repository root:
+    python race_server.py [--bank questions.csv ...] [--port 8765] [--rounds 20] [--players 2]
+
+Protocol: one JSON object per line each way.
+  client -> server  {"type": "join", "name": ...}
+                    {"type": "answer", "round": n, "answer": ...}
+  server -> client  welcome, question, result, leaderboard, round_end, final
+                    (and error, for malformed or late messages)
+"""
+import argparse
+import asyncio
+import heapq
+import json
+import random
+import sys
+from data_loader import load_bank, LiveBank
+from deck import ShuffleBag
+from game_core import score_answer
+from matching import answer_key, SIMILARITY_THRESHOLD
+
+LEADERBOARD_SIZE = 10
+# Live leaderboard pushes per second while a round is running.
+LEADERBOARD_RATE = 2
+# A client this far behind on reading is dropped instead of buffering without bound.
+MAX_WRITE_BUFFER = 1 << 20
+
+
+def encode(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class Player:
+    def __init__(self, player_id, name, writer):
+        self.id = player_id
+        self.name = name
+        self.writer = writer
+        self.score = 0
+        self.streak = 0
+        self.correct = 0
+        self.answered_round = 0
+
+
+class RaceServer:
+    def __init__(self, questions, rounds=20, question_time=15, seed=None):
+        self.questions = questions
+        self.rounds = rounds
+        self.question_time = question_time
+        indices = questions.live_indices() if isinstance(questions, LiveBank) else range(len(questions))
+        self.bag = ShuffleBag(indices, random.Random(seed))
+        # Connected players; everyone who joined stays on the leaderboard.
+        self.players = {}
+        self.entrants = []
+        self.next_id = 1
+        self.round = 0
+        self.question = None
+        self.answers = 0
+        self.all_answered = asyncio.Event()
+        self.joined = asyncio.Event()
+        self.scores_changed = False
+        self.graded = 0
+
+    def send(self, writer, data):
+        if writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            writer.close()
+            return
+        writer.write(data)
+
+    def broadcast(self, message):
+        # Encoded once; the same bytes go to every client.
+        data = encode(message)
+        for player in list(self.players.values()):
+            self.send(player.writer, data)
+
+    def leaderboard(self):
+        top = heapq.nlargest(LEADERBOARD_SIZE, self.entrants, key=lambda p: (p.score, -p.id))
+        return [[p.name, p.score] for p in top]
+
+    async def handle_client(self, reader, writer):
+        player = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    kind = message["type"]
+                except (ValueError, KeyError, TypeError):
+                    self.send(writer, encode({"type": "error", "error": "malformed message"}))
+                    continue
+                if kind == "join" and player is None:
+                    player = Player(self.next_id, str(message.get("name") or f"player{self.next_id}")[:32], writer)
+                    self.next_id += 1
+                    self.players[player.id] = player
+                    self.entrants.append(player)
+                    self.joined.set()
+                    self.send(writer, encode({"type": "welcome", "player": player.id, "rounds": self.rounds}))
+                elif kind == "answer" and player is not None:
+                    self.grade(player, message)
+                else:
+                    self.send(writer, encode({"type": "error", "error": f"unexpected {kind}"}))
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            if player is not None:
+                del self.players[player.id]
+                # Only answers from players still connected count towards ending the round.
+                if self.question is not None and player.answered_round == self.round:
+                    self.answers -= 1
+                self.check_round_done()
+            writer.close()
+
+    def grade(self, player, message):
+        if message.get("round") != self.round or self.question is None or player.answered_round == self.round:
+            self.send(player.writer, encode({"type": "error", "error": "not accepting an answer for that round"}))
+            return
+        player.answered_round = self.round
+        similarity = answer_key(self.question.answer, self.question.extra_info).similarity(str(message.get("answer", "")))
+        points, player.streak, multiplier = score_answer(similarity, player.streak)
+        player.score += points
+        if similarity == 1.0:
+            result = "correct"
+            player.correct += 1
+        elif similarity >= SIMILARITY_THRESHOLD:
+            result = "close"
+            player.correct += 0.5
+        else:
+            result = "incorrect"
+        self.graded += 1
+        self.scores_changed = self.scores_changed or points > 0
+        self.send(player.writer, encode({"type": "result", "round": self.round, "result": result, "points": points,
+                                  "multiplier": multiplier, "score": player.score, "streak": player.streak}))
+        self.answers += 1
+        self.check_round_done()
+
+    def check_round_done(self):
+        if self.question is not None and self.answers >= len(self.players):
+            self.all_answered.set()
+
+    async def push_leaderboards(self):
+        while True:
+            await asyncio.sleep(1 / LEADERBOARD_RATE)
+            if self.scores_changed:
+                self.scores_changed = False
+                self.broadcast({"type": "leaderboard", "round": self.round, "top": self.leaderboard()})
+
+    async def wait_for_players(self, players, lobby):
+        """Wait for `players` to join, or `lobby` seconds after the first one does"""
+        await self.joined.wait()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + lobby
+        while len(self.players) < players and loop.time() < deadline:
+            await asyncio.sleep(0.05)
+
+    async def run_race(self, players=2, lobby=30.0):
+        await self.wait_for_players(players, lobby)
+        pusher = asyncio.create_task(self.push_leaderboards())
+        try:
+            index = None
+            for self.round in range(1, self.rounds + 1):
+                index = self.bag.draw(index)
+                self.question = self.questions[index]
+                self.answers = 0
+                self.all_answered.clear()
+                self.broadcast({"type": "question", "round": self.round, "rounds": self.rounds,
+                                "question": self.question.question, "time": self.question_time})
+                try:
+                    await asyncio.wait_for(self.all_answered.wait(), self.question_time)
+                except asyncio.TimeoutError:
+                    pass
+                # Time's up counts as a miss, as in the single-player game.
+                for player in self.players.values():
+                    if player.answered_round != self.round:
+                        player.streak = 0
+                answer, info = self.question.answer, self.question.extra_info
+                self.question = None
+                self.broadcast({"type": "round_end", "round": self.round, "answer": answer, "info": info,
+                                "top": self.leaderboard()})
+        finally:
+            pusher.cancel()
+        self.broadcast({"type": "final", "top": self.leaderboard()})
+        await self.close()
+
+    async def close(self, timeout=5.0):
+        """Flush and hang up on every client, then wait for their handlers to finish"""
+        players = list(self.players.values())
+        await asyncio.gather(*(p.writer.drain() for p in players), return_exceptions=True)
+        for player in players:
+            player.writer.close()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self.players and loop.time() < deadline:
+            await asyncio.sleep(0.05)
+
+
+async def serve(questions, host="0.0.0.0", port=8765, rounds=20, question_time=15, players=2, lobby=30.0, seed=None):
+    race = RaceServer(questions, rounds, question_time, seed)
+    server = await asyncio.start_server(race.handle_client, host, port)
+    print(f"race server listening on {', '.join(str(s.getsockname()) for s in server.sockets)}")
+    async with server:
+        await race.run_race(players, lobby)
+    return race
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a classroom typing race over the LAN")
+    parser.add_argument("--bank", metavar="CSV", action="append", help="question file; repeat to merge (default: questions.csv)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--question-time", type=float, default=15, help="seconds per question")
+    parser.add_argument("--players", type=int, default=2, help="start as soon as this many have joined")
+    parser.add_argument("--lobby", type=float, default=30.0, help="or this many seconds after the first join")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+    questions = load_bank(args.bank or ["questions.csv"])
+    race = asyncio.run(serve(questions, args.host, args.port, args.rounds, args.question_time,
+                             args.players, args.lobby, args.seed))
+    for rank, (name, score) in enumerate(race.leaderboard(), 1):
+        print(f"{rank:3}. {name:32} {score}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""Record a session's input stream and replay it deterministically.
+
+Run a replay from the repository root:
+    python recording.py session.tgr [--bank questions.csv] [--repeat N]
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+from clock import ManualClock
+from data_loader import load_bank
+from game_core import GameCore, TEXT, BACKSPACE, SUBMIT, PAUSE, START, MENU
+from journal import NullJournal
+
+# File layout: header, then one record per dispatched event or state-changing
+# update: kind (u8), clock time (f64), kind-specific payload. The clock times are
+# the exact floats the game saw, so a replay takes exactly the same branches.
+MAGIC = b"TGRC"
+# Version 2 added the menu's question filter to START records.
+VERSION = 2
+HEADER = struct.Struct("<4sBQdI")
+RECORD = struct.Struct("<Bd")
+TEXT_LENGTH = struct.Struct("<H")
+START_VALUE = struct.Struct("<BII")
+RESULT = struct.Struct("<iII")
+
+TICK, END = 0, 255
+EVENT_CODES = {TEXT: 1, BACKSPACE: 2, SUBMIT: 3, PAUSE: 4, START: 5, MENU: 6}
+EVENT_KINDS = {code: kind for kind, code in EVENT_CODES.items()}
+MODES = ("normal", "clear", "review")
+
+
+class SessionRecorder:
+    def __init__(self, path, seed, bank, epoch=0.0):
+        self.file = open(path, 'wb')
+        bank = bank.encode('utf-8')
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, epoch, len(bank)) + bank)
+
+    def event(self, now, event):
+        kind, value = event
+        self.file.write(RECORD.pack(EVENT_CODES[kind], now))
+        if kind == TEXT:
+            self.write_text(value)
+        elif kind == START:
+            mode, game_length, question_time, question_filter = value
+            self.file.write(START_VALUE.pack(MODES.index(mode), game_length, question_time))
+            self.write_text(question_filter)
+
+    def write_text(self, text):
+        text = text.encode('utf-8')
+        self.file.write(TEXT_LENGTH.pack(len(text)) + text)
+
+    def tick(self, now):
+        self.file.write(RECORD.pack(TICK, now))
+
+    def close(self, game=None):
+        # The final tallies let a replay confirm it reproduced the session.
+        if game is not None:
+            self.file.write(RECORD.pack(END, game.clock.now))
+            self.file.write(RESULT.pack(game.score, game.questions_answered, int(game.questions_correct * 2)))
+        self.file.close()
+
+
+def read_session(path):
+    """Return (seed, epoch, bank, records, result); records are (kind, time, value) with kind an event kind or TICK"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, seed, epoch, bank_length = HEADER.unpack_from(data)
+    if magic != MAGIC or version not in (1, VERSION):
+        raise ValueError(f"{path} is not a session recording")
+    offset = HEADER.size
+    bank = data[offset:offset + bank_length].decode('utf-8')
+    offset += bank_length
+    records = []
+    result = None
+    while offset < len(data):
+        code, now = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        if code == TICK:
+            records.append((TICK, now, None))
+        elif code == END:
+            result = RESULT.unpack_from(data, offset)
+            offset += RESULT.size
+        else:
+            kind = EVENT_KINDS[code]
+            value = None
+            if kind == TEXT:
+                value, offset = read_text(data, offset)
+            elif kind == START:
+                mode, game_length, question_time = START_VALUE.unpack_from(data, offset)
+                offset += START_VALUE.size
+                question_filter = ""
+                if version >= 2:
+                    question_filter, offset = read_text(data, offset)
+                value = (MODES[mode], game_length, question_time, question_filter)
+            records.append((kind, now, value))
+    return seed, epoch, bank, records, result
+
+
+def read_text(data, offset):
+    (length,) = TEXT_LENGTH.unpack_from(data, offset)
+    offset += TEXT_LENGTH.size
+    return data[offset:offset + length].decode('utf-8'), offset + length
+
+
+def replay_session(records, questions, seed, epoch=0.0):
+    """Re-run recorded records against a fresh headless core as fast as possible"""
+    clock = ManualClock(epoch=epoch)
+    game = GameCore(questions, seed=seed, journal=NullJournal(), clock=clock)
+    for kind, now, value in records:
+        clock.now = now
+        if kind == TICK:
+            game.update()
+        else:
+            game.dispatch((kind, value))
+    return game
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded typing game session")
+    parser.add_argument("session", help="recording written by main.py --record")
+    parser.add_argument("--bank", help="question bank to use instead of the recorded one (several files joined with os.pathsep)")
+    parser.add_argument("--repeat", type=int, default=1, help="replay this many times (stress test)")
+    args = parser.parse_args(argv)
+
+    seed, epoch, bank, records, result = read_session(args.session)
+    questions = load_bank((args.bank or bank).split(os.pathsep))
+    if any(kind == START and value[0] == "review" for kind, _, value in records):
+        print("note: Review Mode replays start from an empty schedule and may diverge")
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        game = replay_session(records, questions, seed, epoch)
+    elapsed = time.perf_counter() - start
+    replayed = (game.score, game.questions_answered, int(game.questions_correct * 2))
+    print(f"state {game.state}  score {game.score}  answered {game.questions_answered}  correct {game.questions_correct}")
+    print(f"{len(records) * args.repeat} records in {elapsed:.3f}s ({len(records) * args.repeat / elapsed:,.0f} records/s)")
+    if result is not None:
+        if replayed == tuple(result):
+            print("replay matches the recorded result")
+        else:
+            print(f"replay DIVERGED: recorded score/answered/correct*2 {tuple(result)}, replayed {replayed}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+import pygame
+
+
+class Layer:
+    __slots__ = ("name", "rect", "key", "draw")
+
+    def __init__(self, name, rect, key, draw):
+        self.name = name
+        self.rect = rect
+        self.key = key
+        self.draw = draw
+
+
+# Retained-mode renderer: each frame the game declares its layers (name, rect,
+# content key, draw callback) in z-order. Only layers whose key or rect changed
+# since the last frame are repainted, and only their rects are pushed to the display.
+class Renderer:
+    def __init__(self, screen, background=(0, 0, 0)):
+        self.screen = screen
+        self.background = background
+        self.layers = []
+        self.previous = {}
+        self.full_redraw = True
+
+    def invalidate(self):
+        self.full_redraw = True
+
+    def add(self, name, rect, key, draw):
+        self.layers.append(Layer(name, pygame.Rect(rect), key, draw))
+
+    def dirty_rects(self):
+        if self.full_redraw:
+            return [self.screen.get_rect()]
+        dirty = []
+        current = set()
+        for layer in self.layers:
+            current.add(layer.name)
+            old = self.previous.get(layer.name)
+            if old is None:
+                dirty.append(layer.rect)
+            elif old.key != layer.key or old.rect != layer.rect:
+                dirty.append(old.rect)
+                dirty.append(layer.rect)
+        for name, old in self.previous.items():
+            if name not in current:
+                dirty.append(old.rect)
+        return merge_rects(dirty, self.screen.get_rect())
+
+    def present(self):
+        dirty = self.dirty_rects()
+        for rect in dirty:
+            self.screen.fill(self.background, rect)
+        for layer in self.layers:
+            for rect in dirty:
+                if layer.rect.colliderect(rect):
+                    self.screen.set_clip(rect)
+                    layer.draw()
+        self.screen.set_clip(None)
+        self.previous = {layer.name: layer for layer in self.layers}
+        self.layers = []
+        self.full_redraw = False
+        if dirty and self.screen is pygame.display.get_surface():
+            pygame.display.update(dirty)
+        return dirty
+
+
+def merge_rects(rects, bounds):
+    # Union overlapping rects so translucent layers are never blended twice.
+    merged = []
+    for rect in rects:
+        rect = rect.clip(bounds)
+        if not rect.width or not rect.height:
+            continue
+        i = rect.collidelist(merged)
+        while i != -1:
+            rect = rect.union(merged.pop(i))
+            i = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
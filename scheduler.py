@@ -0,0 +1,54 @@
+import time
+import pygame
+
+# Posted by pygame.time.set_timer while the scheduler is idling so the loop
+# still turns over occasionally without any input.
+HEARTBEAT = pygame.USEREVENT + 1
+
+
+# Event-driven frame scheduler: blocks on pygame.event.wait instead of spinning
+# clock.tick(60). The game tells it how long until the screen next changes.
+class FrameScheduler:
+    def __init__(self, max_fps=60, heartbeat_ms=1000):
+        self.min_interval = 1.0 / max_fps
+        self.heartbeat_ms = heartbeat_ms
+        self.frame_budget = self.min_interval
+        self.idle = False
+        self.idle_time = 0.0
+        self.total_time = 0.0
+        self.frames = 0
+        self.last_frame = time.perf_counter()
+
+    @property
+    def idle_ratio(self):
+        """Fraction of wall time spent blocked waiting for events or timers"""
+        if not self.total_time:
+            return 0.0
+        return self.idle_time / self.total_time
+
+    def set_idle(self, idle):
+        if idle != self.idle:
+            pygame.time.set_timer(HEARTBEAT, self.heartbeat_ms if idle else 0)
+            self.idle = idle
+
+    def wait(self, delay):
+        """Block until input arrives or delay seconds pass (None waits for input only); return pending events"""
+        start = time.perf_counter()
+        self.set_idle(delay is None)
+        if delay is None:
+            self.frame_budget = None
+            first = pygame.event.wait()
+        else:
+            # Never run faster than max_fps, even if the game asks for it.
+            delay = max(delay, self.min_interval - (start - self.last_frame))
+            self.frame_budget = delay
+            timeout = int(delay * 1000)
+            first = pygame.event.wait(timeout) if timeout > 0 else pygame.event.poll()
+        events = [first] if first.type != pygame.NOEVENT else []
+        events.extend(pygame.event.get())
+        now = time.perf_counter()
+        self.idle_time += now - start
+        self.total_time += now - self.last_frame
+        self.last_frame = now
+        self.frames += 1
+        return events
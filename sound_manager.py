@@ -1,14 +1,94 @@
-import pygame
+import os
+import threading
+from pathlib import Path
+from utils import get_data_folder
+
+try:
+    import pygame
+except ImportError:  # headless tools and benchmarks run without pygame
+    pygame = None
 
 class SoundManager:
-    def __init__(self, success_path="sounds/success.mp3", failure_path="sounds/failure.mp3"):
-        pygame.mixer.init()
-        self.correct_sound = pygame.mixer.Sound(success_path)
-        self.wrong_sound = pygame.mixer.Sound(failure_path)
+    """Feedback sounds decoded in the background and played on reserved mixer channels.
+
+    Decoded PCM is cached under the data folder, so only the first launch decodes
+    the MP3s. Without an audio device, or before loading finishes, play_* is a no-op.
+    """
+    def __init__(self, success_path="sounds/success.mp3", failure_path="sounds/failure.mp3", channels=4, cache_folder=None):
+        self.correct_sound = None
+        self.wrong_sound = None
+        self.channels = []
+        self.next_channel = 0
+        self.cache_folder = Path(cache_folder) if cache_folder else get_data_folder() / 'sound_cache'
+        if not self.init_mixer():
+            return
+        # Reserved channels are never handed out to other sounds, so feedback always gets one.
+        channels = min(channels, pygame.mixer.get_num_channels())
+        pygame.mixer.set_reserved(channels)
+        self.channels = [pygame.mixer.Channel(i) for i in range(channels)]
+        self.loader = threading.Thread(target=self.load, args=(success_path, failure_path), name="sound-loader", daemon=True)
+        self.loader.start()
+
+    def init_mixer(self):
+        if pygame is None:
+            return False
+        if pygame.mixer.get_init():
+            return True
+        try:
+            pygame.mixer.init()
+        except pygame.error as e:
+            print(f'Sound disabled: {e}')
+            return False
+        return True
+
+    def load(self, success_path, failure_path):
+        self.correct_sound = self.load_sound(success_path)
+        self.wrong_sound = self.load_sound(failure_path)
+
+    def load_sound(self, path):
+        try:
+            stat = os.stat(path)
+            frequency, size, channels = pygame.mixer.get_init()
+            stem = Path(path).stem
+            cache_path = self.cache_folder / f'{stem}-{stat.st_size}-{stat.st_mtime_ns}-{frequency}-{size}-{channels}.pcm'
+            if cache_path.exists():
+                return pygame.mixer.Sound(buffer=cache_path.read_bytes())
+            sound = pygame.mixer.Sound(path)
+            self.write_cache(cache_path, stem, sound.get_raw())
+            return sound
+        except (pygame.error, OSError) as e:
+            print(f'Error loading sound {path}: {e}')
+            return None
+
+    def write_cache(self, cache_path, stem, raw):
+        try:
+            self.cache_folder.mkdir(parents=True, exist_ok=True)
+            for stale in self.cache_folder.glob(f'{stem}-*.pcm'):
+                stale.unlink()
+            tmp_path = cache_path.with_suffix('.tmp')
+            tmp_path.write_bytes(raw)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass  # no cache this time; decode again next launch
+
+    def play(self, sound):
+        if sound is None or not self.channels:
+            return
+        # Round-robin: a burst of answers reuses the oldest channel instead of waiting for a free one.
+        channel = self.channels[self.next_channel]
+        self.next_channel = (self.next_channel + 1) % len(self.channels)
+        channel.play(sound)
 
     def play_correct(self):
-        self.correct_sound.play()
+        self.play(self.correct_sound)
 
     def play_wrong(self):
-        self.wrong_sound.play()
+        self.play(self.wrong_sound)
+
 
+class NullSoundManager:
+    def play_correct(self):
+        pass
+
+    def play_wrong(self):
+        pass
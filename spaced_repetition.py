@@ -0,0 +1,204 @@
+import hashlib
+import heapq
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+
+DAY = 24 * 60 * 60
+# A missed question comes back within the same session.
+RELEARN_DELAY = 60
+
+# Answer quality on the SM-2 0-5 scale.
+QUALITY_CORRECT = 5
+QUALITY_CLOSE = 3
+QUALITY_WRONG = 1
+
+
+def question_key(question, answer):
+    """Stable id for a question: survives reordering and edits to its extra info"""
+    text = f"{question.strip()}\x1f{answer.strip()}"
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+class ReviewState:
+    __slots__ = ("ease", "interval", "reps", "due", "lapses")
+
+    def __init__(self, ease=2.5, interval=0.0, reps=0, due=0.0, lapses=0):
+        self.ease = ease
+        self.interval = interval
+        self.reps = reps
+        self.due = due
+        self.lapses = lapses
+
+    def review(self, quality, now):
+        """SM-2 update for one answer of the given quality"""
+        if quality < 3:
+            self.reps = 0
+            self.lapses += 1
+            self.interval = 0.0
+            self.due = now + RELEARN_DELAY
+        else:
+            self.reps += 1
+            if self.reps == 1:
+                self.interval = 1.0
+            elif self.reps == 2:
+                self.interval = 6.0
+            else:
+                self.interval = round(self.interval * self.ease, 2)
+            self.due = now + self.interval * DAY
+        self.ease = max(1.3, self.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+
+# Per-question review state, persisted as an append-only JSON-lines log: one
+# line per answer, last line wins. Loading runs on a background thread and the
+# log is compacted when it holds far more lines than questions.
+class ReviewStore:
+    def __init__(self, path=None):
+        # path=None keeps state in memory only (replays, benchmarks).
+        self.path = Path(path) if path is not None else None
+        self.states = {}
+        self.file = None
+        self.loaded = threading.Event()
+        threading.Thread(target=self.load, name="review-store", daemon=True).start()
+
+    def load(self):
+        lines = 0
+        if self.path is None:
+            self.loaded.set()
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        key, *values = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from a crash
+                    self.states[key] = ReviewState(*values)
+                    lines += 1
+            if lines > 2 * len(self.states) + 1000:
+                self.compact()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f'Error loading review state: {e}')
+        finally:
+            self.loaded.set()
+
+    def compact(self):
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for key, state in self.states.items():
+                f.write(self.encode(key, state))
+        os.replace(tmp_path, self.path)
+
+    def encode(self, key, state):
+        return json.dumps([key, round(state.ease, 3), state.interval, state.reps, round(state.due, 1), state.lapses]) + '\n'
+
+    def get(self, key):
+        self.loaded.wait()
+        return self.states.get(key)
+
+    def update(self, key, state):
+        self.states[key] = state
+        if self.path is None:
+            return
+        try:
+            if self.file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self.file = open(self.path, 'a', encoding='utf-8')
+            self.file.write(self.encode(key, state))
+            self.file.flush()
+        except OSError as e:
+            print(f'Error saving review state: {e}')
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+# Review Mode deck: a due-time priority queue over the questions already seen,
+# and the unseen ones in random order. Questions already due come first (oldest
+# first, so a miss is back about RELEARN_DELAY later however many new questions
+# wait), then new ones, then the rest by due time. Drawing and grading are O(log n).
+class ReviewDeck:
+    def __init__(self, questions, store, rng=None, keys=None):
+        self.rng = rng or random.Random()
+        self.store = store
+        self.store.loaded.wait()
+        # question_key per index; the caller keeps it across decks so a bank is hashed once.
+        self.keys = {} if keys is None else keys
+        self.heap = []
+        self.new = []
+        # Indices dropped by a bank reload; their entries are skipped when they surface.
+        self.removed = set()
+        for index, question in enumerate(questions):
+            if question is None:
+                continue
+            state = self.state(index, question)
+            if state is None:
+                self.new.append(index)
+            else:
+                self.heap.append((state.due, self.rng.random(), index))
+        heapq.heapify(self.heap)
+        self.rng.shuffle(self.new)
+
+    def state(self, index, question):
+        key = self.keys.get(index)
+        if key is None:
+            key = self.keys[index] = question_key(question.question, question.answer)
+        return self.store.states.get(key)
+
+    def __len__(self):
+        return len(self.heap) + len(self.new)
+
+    def add(self, index, question):
+        self.removed.discard(index)
+        state = self.state(index, question)
+        if state is not None:
+            heapq.heappush(self.heap, (state.due, self.rng.random(), index))
+            return
+        # Into a random slot among the unseen questions.
+        self.new.append(index)
+        j = self.rng.randrange(len(self.new))
+        self.new[j], self.new[-1] = self.new[-1], self.new[j]
+
+    def discard(self, index):
+        self.removed.add(index)
+
+    def drop_removed(self):
+        while self.heap and self.heap[0][2] in self.removed:
+            heapq.heappop(self.heap)
+        while self.new and self.new[-1] in self.removed:
+            self.new.pop()
+
+    def draw(self, avoid=None, now=None):
+        """Take the most urgent question out of the queue until it is graded"""
+        now = time.time() if now is None else now
+        self.drop_removed()
+        if self.heap and (self.heap[0][0] <= now or not self.new):
+            entry = heapq.heappop(self.heap)
+            self.drop_removed()
+            if entry[2] == avoid:
+                if self.new:
+                    heapq.heappush(self.heap, entry)
+                    return self.new.pop()
+                if self.heap:
+                    entry = heapq.heapreplace(self.heap, entry)
+            return entry[2]
+        if self.new:
+            return self.new.pop()
+        # Everything is out waiting for a grade; only happens with a single question.
+        return avoid
+
+    def grade(self, index, quality, now=None):
+        now = time.time() if now is None else now
+        key = self.keys[index]
+        state = self.store.get(key) or ReviewState()
+        state.review(quality, now)
+        self.store.update(key, state)
+        if index not in self.removed:
+            heapq.heappush(self.heap, (state.due, self.rng.random(), index))
@@ -0,0 +1,56 @@
+import re
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(.*)$")
+
+
+# Per-phase timings for --profile-startup. Phases may run on worker threads.
+class StartupProfile:
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.phases = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self.lock:
+                self.phases.append((name, threading.current_thread().name, begin - self.start, end - self.start))
+
+    def mark(self, name):
+        now = time.perf_counter() - self.start
+        with self.lock:
+            self.phases.append((name, threading.current_thread().name, now, now))
+
+    def report(self, imports=None):
+        lines = ["Startup profile (ms since launch)",
+                 f"  {'phase':20} {'thread':14} {'start':>8} {'end':>8} {'took':>8}"]
+        for name, thread, begin, end in sorted(self.phases, key=lambda p: p[2]):
+            lines.append(f"  {name:20} {thread[:14]:14} {begin * 1000:8.1f} {end * 1000:8.1f} {(end - begin) * 1000:8.1f}")
+        if imports:
+            lines.append("Slowest imports (-X importtime, cumulative ms)")
+            for cumulative, self_time, module in imports:
+                lines.append(f"  {module:34} {cumulative / 1000:8.1f}  (self {self_time / 1000:.1f})")
+        return "\n".join(lines)
+
+
+def import_times(modules, top=15):
+    """Import modules in a fresh interpreter under -X importtime; return the slowest (cumulative_us, self_us, name)"""
+    code = "; ".join(f"import {m}" for m in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            entries.append((int(match.group(2)), int(match.group(1)), match.group(3).strip()))
+    entries.sort(reverse=True)
+    return entries[:top]
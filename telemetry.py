@@ -0,0 +1,124 @@
+from array import array
+
+BACKSPACE_CODE = 8
+ENTER_CODE = 13
+# Text events longer than one character (a paste, an IME commit) are one record:
+# TEXT_RUN plus the length, above every Unicode code point.
+TEXT_RUN = 0x110000
+
+
+class TypingStats:
+    __slots__ = ("questions", "chars", "backspaces", "typing_time", "hesitation")
+
+    def __init__(self, questions=0, chars=0, backspaces=0, typing_time=0.0, hesitation=0.0):
+        self.questions = questions
+        self.chars = chars
+        self.backspaces = backspaces
+        # Seconds from each question's first key to its last (Enter, or the last key before a timeout).
+        self.typing_time = typing_time
+        # Seconds from each question appearing to its first key.
+        self.hesitation = hesitation
+
+    def add(self, other):
+        self.questions += other.questions
+        self.chars += other.chars
+        self.backspaces += other.backspaces
+        self.typing_time += other.typing_time
+        self.hesitation += other.hesitation
+
+    @property
+    def wpm(self):
+        """Gross words per minute: characters typed, corrected or not, at five per word"""
+        return self.chars / 5 / (self.typing_time / 60) if self.typing_time > 0 else 0.0
+
+    @property
+    def backspace_rate(self):
+        keys = self.chars + self.backspaces
+        return self.backspaces / keys if keys else 0.0
+
+    @property
+    def mean_hesitation(self):
+        return self.hesitation / self.questions if self.questions else 0.0
+
+    def summary(self):
+        return f"{self.wpm:.0f} WPM, {self.mean_hesitation:.1f}s to first key, {self.backspace_rate:.0%} backspaces"
+
+
+# Keystroke capture for a session. Timestamps and key codes go into two
+# preallocated arrays used as a ring buffer, and the current question's
+# character and backspace counts are kept up as it is typed, so ending a
+# question is O(1): it reads back only its first and last key times.
+# A TypingStats for one question is only built when a miss needs one.
+class KeystrokeLog:
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.times = array('d', [0.0]) * capacity
+        self.codes = array('I', [0]) * capacity
+        self.reset()
+
+    def reset(self):
+        # Keys captured so far; the buffer holds the last `capacity` of them.
+        self.count = 0
+        self.session = TypingStats()
+        self.typed = False
+        self.typing_time = 0.0
+        self.hesitation = 0.0
+        self.begin_question(0.0)
+
+    def begin_question(self, now):
+        self.start = self.count
+        self.shown = now
+        self.paused = 0.0
+        self.chars = 0
+        self.backspaces = 0
+
+    def key(self, now, code):
+        i = self.count % self.capacity
+        self.times[i] = now
+        self.codes[i] = code
+        self.count += 1
+        if code == BACKSPACE_CODE:
+            self.backspaces += 1
+        elif code != ENTER_CODE:
+            self.chars += 1
+
+    def run(self, now, length):
+        i = self.count % self.capacity
+        self.times[i] = now
+        self.codes[i] = TEXT_RUN + length
+        self.count += 1
+        self.chars += length
+
+    def resume(self, delta):
+        """Leave a pause of delta seconds out of the current question's timings"""
+        if self.count == self.start:
+            self.shown += delta
+        else:
+            self.paused += delta
+
+    def end_question(self):
+        """Fold the keys since begin_question into the session totals; question_stats() then describes them"""
+        count, start, capacity = self.count, self.start, self.capacity
+        if count == start:
+            self.typed = False
+            return
+        # The first key's time, or the oldest still in the buffer for a question longer than it.
+        first = self.times[start % capacity if count - start <= capacity else count % capacity]
+        typing_time = self.times[(count - 1) % capacity] - first - self.paused
+        hesitation = first - self.shown
+        self.typing_time = typing_time if typing_time > 0 else 0.0
+        self.hesitation = hesitation if hesitation > 0 else 0.0
+        self.typed = True
+        session = self.session
+        session.questions += 1
+        session.chars += self.chars
+        session.backspaces += self.backspaces
+        session.typing_time += self.typing_time
+        session.hesitation += self.hesitation
+        self.start = count
+
+    def question_stats(self):
+        """TypingStats for the question end_question last folded in, or None if it had no keys"""
+        if not self.typed:
+            return None
+        return TypingStats(1, self.chars, self.backspaces, self.typing_time, self.hesitation)
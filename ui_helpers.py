@@ -1,11 +1,73 @@
+import time
 import pygame
+from collections import OrderedDict
 
-# UI Helper Functions
-def draw_text(surface, text, pos, font, color=(255, 255, 255)):
-    text_surface = font.render(text, True, color)
-    surface.blit(text_surface, pos)
 
-def draw_wrapped_text(surface, text, pos, font, color=(255, 255, 255), max_width=700):
+# Text cache: rendered surfaces and wrapped layouts keyed by (text, font, color, max_width).
+class TextCache:
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    # Main thread only: fonts are not safe to render from two threads, so nothing else renders.
+    def get(self, key, build):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+        self.misses += 1
+        entry = build()
+        self.entries[key] = entry
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries)}
+
+
+text_cache = TextCache()
+
+
+def render_text(text, font, color=(255, 255, 255)):
+    """Return a cached surface for text rendered with font and color"""
+    color = tuple(color)
+    return text_cache.get((text, font, color, None), lambda: font.render(text, True, color))
+
+
+def wrap_text(text, font, max_width=700):
+    """Return the cached tuple of lines text wraps to at max_width"""
+    return text_cache.get((text, font, None, max_width), lambda: _wrap_lines(text, font, max_width))
+
+
+# Renders (text, color) pairs into the cache ahead of the frames that need them,
+# a slice at a time between frames on the main thread.
+class WarmUp:
+    def __init__(self, font, texts):
+        self.font = font
+        self.pending = list(texts)
+        self.pending.reverse()
+
+    def step(self, budget=0.002):
+        """Render until budget seconds pass (None renders everything); True while texts remain"""
+        deadline = None if budget is None else time.perf_counter() + budget
+        while self.pending:
+            text, color = self.pending.pop()
+            render_text(text, self.font, color)
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+        return bool(self.pending)
+
+
+def _wrap_lines(text, font, max_width):
     words = text.split(' ')
     lines = []
     current_line = ''
@@ -18,14 +80,27 @@ def draw_wrapped_text(surface, text, pos, font, color=(255, 255, 255), max_width
             lines.append(current_line)
             current_line = word + ' '
     lines.append(current_line)
+    return tuple(lines)
+
+
+# UI Helper Functions
+def draw_text(surface, text, pos, font, color=(255, 255, 255)):
+    text_surface = render_text(text, font, color)
+    surface.blit(text_surface, pos)
 
+def draw_wrapped_text(surface, text, pos, font, color=(255, 255, 255), max_width=700):
     x, y = pos
-    for line in lines:
-        line_surface = font.render(line, True, color)
+    for line in wrap_text(text, font, max_width):
+        line_surface = render_text(line, font, color)
         surface.blit(line_surface, (x, y))
         y += font.get_height()
 
 
+def wrapped_height(lines, font):
+    """Height draw_wrapped_text covers for these lines, descenders included"""
+    return (len(lines) - 1) * font.get_height() + font.get_linesize() if lines else 0
+
+
 def button(rect, text, screen, font):
     pygame.draw.rect(screen, (0, 128, 255), rect)
     draw_text(screen, text, (rect[0] + 10, rect[1] + 10), font)
@@ -40,7 +115,7 @@ class TextInputBox:
         self.color = self.color_inactive
         self.text = text
         self.font = font
-        self.txt_surface = font.render(text, True, (0, 0, 0)) if font else None
+        self.txt_surface = render_text(text, font, (0, 0, 0)) if font else None
         self.active = False
 
     def handle_event(self, event):
@@ -48,7 +123,7 @@ class TextInputBox:
             if self.rect.collidepoint(event.pos):
                 self.active = True
                 self.text = ""
-                self.txt_surface = self.font.render(self.text, True, (0, 0, 0))
+                self.txt_surface = render_text(self.text, self.font, (0, 0, 0))
                 self.color = self.color_active
             else:
                 self.active = False
@@ -61,11 +136,10 @@ class TextInputBox:
                 self.text = self.text[:-1]
             else:
                 self.text += event.unicode
-            self.txt_surface = self.font.render(self.text, True, (0, 0, 0))
+            self.txt_surface = render_text(self.text, self.font, (0, 0, 0))
 
     def draw(self, surface):
         bg_color = (150, 150, 150) if self.active else (200, 200, 200)
         pygame.draw.rect(surface, bg_color, self.rect)
         pygame.draw.rect(surface, self.color, self.rect, 2)
         surface.blit(self.txt_surface, (self.rect.x + 5, self.rect.y + 5))
-
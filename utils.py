@@ -1,11 +1,6 @@
-import difflib
 import os
 from pathlib import Path
 
-def calculate_similarity(answer1, answer2):
-    """Calculate similarity between two strings using difflib.SequenceMatcher"""
-    return difflib.SequenceMatcher(None, answer1.lower().strip(), answer2.lower().strip()).ratio()
-
 
 def get_documents_folder():
     """Get the OS-independent Documents folder path"""
@@ -14,3 +9,11 @@ def get_documents_folder():
     else:  # Unix-like (Linux, macOS)
         return Path.home() / 'Documents'
 
+
+def get_data_folder():
+    """Get the per-user folder for the game's own state files"""
+    if os.name == 'nt':  # Windows
+        return Path(os.environ.get('LOCALAPPDATA', Path.home() / 'AppData' / 'Local')) / 'APlusTypingGame'
+    else:  # Unix-like (Linux, macOS)
+        return Path(os.environ.get('XDG_DATA_HOME', Path.home() / '.local' / 'share')) / 'aplus-typing-game'
+